@@ -0,0 +1,60 @@
+"""Measure interpreter startup cost of importing the ``model`` package.
+
+Each statement is run in a fresh interpreter so module caches do not hide
+the import cost. Compares the lazy ``import model`` against the eager
+import of the full pick and place stack.
+
+Usage:
+    python benchmarks/import_time.py [--runs N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STATEMENTS = {
+    "baseline (python -c pass)": "pass",
+    "import model": "import model",
+    "from model import Target": "from model import Target",
+    "import model.pick_and_place": "import model.pick_and_place",
+}
+
+
+def time_statement(statement: str, runs: int) -> list:
+    """Time ``python -c statement`` in fresh interpreters.
+
+    Args:
+        statement (str): Python source passed to ``-c``.
+        runs (int): Number of interpreter launches.
+
+    Returns:
+        list: Wall-clock duration of each run in seconds.
+    """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, statement in STATEMENTS.items():
+        durations = time_statement(statement, args.runs)
+        print(
+            f"{label:<30} median {statistics.median(durations) * 1000:8.2f} ms"
+            f"  min {min(durations) * 1000:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
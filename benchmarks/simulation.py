@@ -0,0 +1,64 @@
+"""Measure the wall-clock time of a simulated shift against its budget.
+
+Runs ``Simulation`` on random jobs, the same run as
+``python -m model.simulation``, and exits with status 1 if the median run
+takes longer than the budget.
+
+Usage:
+    python benchmarks/simulation.py [--robots N] [--hours H] [--runs N]
+                                    [--budget SECONDS]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from model.simulation import Simulation, random_jobs  # noqa: E402
+
+
+def time_simulation(robots: int, hours: float, runs: int) -> list:
+    """Time full simulation runs.
+
+    Args:
+        robots (int): Number of simulated robots.
+        hours (float): Simulated duration in hours.
+        runs (int): Number of runs.
+
+    Returns:
+        list: Wall-clock duration of each run in seconds.
+    """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        report = Simulation(random_jobs(seed=0), robots, seed=0).run(hours * 3600)
+        durations.append(time.perf_counter() - start)
+        if report.completed + report.failed == 0:
+            raise RuntimeError("Simulation did not process any job")
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--robots", type=int, default=50)
+    parser.add_argument("--hours", type=float, default=8.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=30.0)
+    args = parser.parse_args()
+
+    durations = time_simulation(args.robots, args.hours, args.runs)
+    median = statistics.median(durations)
+    print(
+        f"{args.robots} robots for {args.hours:g} h"
+        f"  median {median:8.2f} s  min {min(durations):8.2f} s"
+        f"  budget {args.budget:g} s"
+    )
+    if median > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
-from model.pick_and_place import PickAndPlaceRobot
-from model.utils import Target
+from model import PickAndPlaceRobot, Target
 
 
 def main():
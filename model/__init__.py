@@ -0,0 +1,70 @@
+"""Pick and place robot model built on ``transitions`` state machines.
+
+The public API is resolved lazily: ``import model`` does not import
+``transitions`` or any sub-machine until one of the names below is first
+accessed, so short-lived processes that only need ``Target`` parsing stay
+cheap to start.
+"""
+
+from importlib import import_module
+
+# Avoids importing ``typing`` at startup; type checkers treat it as True.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from model.arm import Arm
+    from model.bulk import iter_target_pairs, iter_targets
+    from model.gripper import Gripper
+    from model.gripper_bank import GripperBank
+    from model.metrics import MetricsRegistry
+    from model.pick_and_place import PickAndPlaceRobot
+    from model.simulation import Simulation
+    from model.trace import TraceRecorder, TraceReplayer
+    from model.utils import Pose, Position, Target
+    from model.watchdog import TimerWheel, Watchdog
+    from model.workspace import Box, Workspace
+
+_LAZY_ATTRIBUTES = {
+    "Arm": "model.arm",
+    "Box": "model.workspace",
+    "Gripper": "model.gripper",
+    "GripperBank": "model.gripper_bank",
+    "MetricsRegistry": "model.metrics",
+    "PickAndPlaceRobot": "model.pick_and_place",
+    "Pose": "model.utils",
+    "Position": "model.utils",
+    "Simulation": "model.simulation",
+    "Target": "model.utils",
+    "TimerWheel": "model.watchdog",
+    "TraceRecorder": "model.trace",
+    "TraceReplayer": "model.trace",
+    "Watchdog": "model.watchdog",
+    "Workspace": "model.workspace",
+    "iter_target_pairs": "model.bulk",
+    "iter_targets": "model.bulk",
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    """Import the submodule owning ``name`` on first access.
+
+    Args:
+        name (str): Attribute requested from the package.
+
+    Raises:
+        AttributeError: If ``name`` is not part of the public API.
+
+    Returns:
+        The requested class, cached on the package afterwards.
+    """
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -1,12 +1,36 @@
+import threading
 import time
+from typing import TYPE_CHECKING, Callable, Optional
 
 from transitions import Machine
+from model.fault import FaultMixin, fault_state, fault_transition
 from model.utils import Position, Pose
 
+if TYPE_CHECKING:
+    from model.workspace import Workspace
 
-class Arm(object):
+
+def _same_position(a: Optional[Position], b: Optional[Position]) -> bool:
+    if a is None or b is None:
+        return False
+    return (a.x, a.y, a.z) == (b.x, b.y, b.z)
+
+
+def _same_pose(a: Optional[Pose], b: Optional[Pose]) -> bool:
+    if a is None or b is None:
+        return False
+    return (a.roll, a.pitch, a.yaw) == (b.roll, b.pitch, b.yaw)
+
+
+class Arm(FaultMixin):
     """Class (sub-machine) of the Arm manipulator.
     The Arm has to go to a position and pose.
+
+    One thread drives the Arm through ``execute_fsm`` or ``reset``, others
+    may only call ``retarget``. Both hold the same re-entrant lock while
+    they check and fire triggers. A move runs entirely inside its trigger,
+    so a target passed to ``retarget`` from another thread takes effect
+    once the move in progress has finished.
     """
 
     states = [
@@ -44,6 +68,7 @@ class Arm(object):
                 "current_state",
             ],
         },
+        fault_state(),
     ]
 
     transitions = [
@@ -85,9 +110,33 @@ class Arm(object):
             "source": "reset",
             "dest": "idle",
         },
+        {
+            "trigger": "retarget_pose",
+            "source": "pose",
+            "dest": "pose",
+            "conditions": ["has_pending_target", "is_pending_position_reached"],
+            "before": ["apply_pending_target"],
+        },
+        {
+            "trigger": "retarget_position",
+            "source": ["go_to_position", "pose"],
+            "dest": "go_to_position",
+            "conditions": ["has_pending_target", "is_pending_target_valid"],
+            "before": ["apply_pending_target"],
+        },
+        {
+            "trigger": "reset_fault",
+            "source": "fault",
+            "dest": "reset",
+        },
+        fault_transition(states),
     ]
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        workspace: Optional["Workspace"] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
         self.machine = Machine(
             model=self,
             states=Arm.states,
@@ -102,6 +151,13 @@ class Arm(object):
 
         self.target_position = None
         self.target_pose = None
+        self._pending_target = None
+        self._lock = threading.RLock()
+        # Triggers leaving each state, the transitions never change.
+        self._available_triggers = {}
+
+        self.workspace = workspace
+        self.sleep = sleep
 
     @property
     def is_positioned(self) -> bool:
@@ -111,22 +167,45 @@ class Arm(object):
     def is_posed(self) -> bool:
         return self._is_posed
 
+    @property
+    def has_pending_target(self) -> bool:
+        return self._pending_target is not None
+
+    def _validate_target(self, position: Position, pose: Pose) -> bool:
+        valid_position = isinstance(position, Position)
+        valid_pose = isinstance(pose, Pose)
+        validation = valid_position and valid_pose
+        if not validation:
+            raise ValueError("Invalid target position or pose", position, pose)
+        if self.workspace is not None and not self.workspace.is_position_allowed(
+            position
+        ):
+            raise ValueError("Target position outside the allowed workspace", position)
+        return validation
+
     def is_target_valid(self) -> bool:
         """Check if the target position and pose are valid.
+        If the Arm has a workspace, the target position must also be allowed
+        by it.
 
         Returns:
             bool: validity of the target position and pose.
         """
-        valid_position = isinstance(self.target_position, Position)
-        valid_pose = isinstance(self.target_pose, Pose)
-        validation = valid_position and valid_pose
-        if not validation:
-            raise ValueError(
-                "Invalid target position or pose",
-                self.target_position,
-                self.target_pose,
-            )
-        return validation
+        return self._validate_target(self.target_position, self.target_pose)
+
+    def is_pending_target_valid(self) -> bool:
+        """Same as ``is_target_valid`` for the target passed to ``retarget``."""
+        return self._validate_target(*self._pending_target)
+
+    def is_pending_position_reached(self) -> bool:
+        """
+        Returns:
+            bool: True if the Arm already is at the position passed to
+                  ``retarget``, so only the pose has to change.
+        """
+        return self.is_pending_target_valid() and _same_position(
+            self.current_position, self._pending_target[0]
+        )
 
     def reset_attributes(self) -> None:
         """Reset the attributes of the Arm."""
@@ -154,46 +233,100 @@ class Arm(object):
         self.target_position = position
         self.target_pose = pose
 
+    def apply_pending_target(self) -> None:
+        """Make the target passed to ``retarget`` the current target."""
+        self.set_target(*self._pending_target)
+        self._pending_target = None
+        if not _same_position(self.current_position, self.target_position):
+            self._is_positioned = False
+        self._is_posed = False
+
+    def retarget(self, position: Position, pose: Pose) -> bool:
+        """Change the target of a move in progress without a reset cycle.
+
+        Only allowed while in ``go_to_position`` or ``pose``. If the Arm is
+        posing and already at ``position``, only the pose is redone,
+        otherwise the Arm goes back to ``go_to_position`` and moves from
+        where it is to the new target.
+
+        Moves are not interruptible: called from another thread while the
+        Arm is moving, it waits for the move to finish. The following move
+        starts at the reached position and takes a full move time whatever
+        distance is left, partial motion is not modeled.
+
+        Args:
+            position (Position): New target position.
+            pose (Pose): New target pose.
+
+        Raises:
+            MachineError: If the Arm is not moving.
+            ValueError: If the new target is invalid. The current target is
+                        kept in that case.
+
+        Returns:
+            bool: True if the Arm was re-targeted.
+        """
+        with self._lock:
+            self._pending_target = (position, pose)
+            try:
+                if self.may_retarget_pose():
+                    return self.retarget_pose()
+                return self.retarget_position()
+            finally:
+                self._pending_target = None
+
     def going_to_position(self) -> None:
         """
         Method to move the robot to the target position.
+        Only the remaining motion is done if the Arm already is there.
         """
-        time.sleep(1)
+        if not _same_position(self.current_position, self.target_position):
+            self.sleep(1)
+        self.current_position = self.target_position
         self._is_positioned = True
 
     def posing(self) -> None:
-        time.sleep(1)
+        if not _same_pose(self.current_pose, self.target_pose):
+            self.sleep(1)
+        self.current_pose = self.target_pose
         self._is_posed = True
 
     def stop_arm(self) -> None:
         print("Stopping the arm...")
-        time.sleep(1)
+        self.sleep(1)
 
-    def execute_fsm(self) -> None:
-        while self.state != "finish":
-            available_transitions = self.machine.get_triggers(self.state)
-            available_transitions = available_transitions[len(self.states) :]
+    def _fire_allowed_triggers(self) -> None:
+        """Fire the first allowed trigger of the current state.
+
+        The lock is held for the whole pass, so another thread cannot change
+        the state while a trigger checks its conditions. Every cached trigger
+        leaves the current state, so it returns False instead of raising when
+        its conditions fail, and no ``may_*`` check is needed. The pass ends
+        after a trigger fired, the triggers left over belong to the previous
+        state.
+        """
+        with self._lock:
+            available_transitions = self._available_triggers.get(self.state)
+            if available_transitions is None:
+                available_transitions = self.machine.get_triggers(self.state)
+                available_transitions = available_transitions[len(self.states) :]
+                self._available_triggers[self.state] = available_transitions
             for current_transition in range(len(available_transitions)):
                 method = getattr(self, available_transitions[current_transition])
-                may_method = getattr(
-                    self, "may_" + available_transitions[current_transition]
-                )
-                if may_method():
-                    print(f"Executing: {available_transitions[current_transition]}")
-                    method()
+                if method():
+                    print(f"Executed: {available_transitions[current_transition]}")
+                    return
+
+    def execute_fsm(self) -> None:
+        while self.state not in ("finish", "fault"):
+            self._fire_allowed_triggers()
 
     def reset(self) -> None:
-        while self.state != "idle":
-            available_transitions = self.machine.get_triggers(self.state)
-            available_transitions = available_transitions[len(self.states) :]
-            for current_transition in range(len(available_transitions)):
-                method = getattr(self, available_transitions[current_transition])
-                may_method = getattr(
-                    self, "may_" + available_transitions[current_transition]
-                )
-                if may_method():
-                    print(f"Executing: {available_transitions[current_transition]}")
-                    method()
+        if self.state == "fault":
+            print("Executing: reset_fault")
+            self.reset_fault()
+        while self.state not in ("idle", "fault"):
+            self._fire_allowed_triggers()
 
     def execute(self, position: Position, pose: Pose) -> None:
         self.set_target(position, pose)
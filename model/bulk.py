@@ -0,0 +1,251 @@
+"""Bulk loading of targets from job manifests.
+
+Supported formats:
+    - ``.csv``: rows of comma separated numbers, parsed chunk by chunk.
+    - ``.npy``: a 2-D array, memory-mapped.
+    - ``.npz``: the array stored under ``key`` (the first one by default),
+      memory-mapped unless the archive is compressed.
+    - ``.bin``: raw little-endian float64 records, memory-mapped.
+
+Each row holds either one target (x, y, z, roll, pitch, yaw) or a pick and
+place pair (the pick target followed by the place target).
+"""
+
+import struct
+import zipfile
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+from model.utils import Target
+from model.workspace import Workspace
+
+TARGET_FIELDS = 6
+PAIR_FIELDS = 2 * TARGET_FIELDS
+DEFAULT_CHUNK_SIZE = 65536
+
+PathLike = Union[str, Path]
+
+
+def _check_shape(array: np.ndarray, columns: Optional[int]) -> None:
+    if array.ndim != 2 or array.shape[1] not in (TARGET_FIELDS, PAIR_FIELDS):
+        raise ValueError(
+            f"Target arrays must have shape (N, {TARGET_FIELDS}) "
+            f"or (N, {PAIR_FIELDS})",
+            array.shape,
+        )
+    if columns is not None and array.shape[1] != columns:
+        raise ValueError(f"Expected {columns} columns", array.shape)
+
+
+def _open_npz_member(path: Path, key: Optional[str]) -> np.ndarray:
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        name = f"{key}.npy" if key is not None else names[0]
+        try:
+            info = archive.getinfo(name)
+        except KeyError:
+            raise ValueError("No array named", key, path) from None
+    if info.compress_type != zipfile.ZIP_STORED:
+        with np.load(path) as archive:
+            return archive[name[: -len(".npy")]]
+
+    with open(path, "rb") as archive_file:
+        # The member data follows its local file header, whose name and
+        # extra field lengths may differ from the central directory.
+        archive_file.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack("<HH", archive_file.read(4))
+        archive_file.seek(name_length + extra_length, 1)
+        version = np.lib.format.read_magic(archive_file)
+        if version == (1, 0):
+            header = np.lib.format.read_array_header_1_0(archive_file)
+        else:
+            header = np.lib.format.read_array_header_2_0(archive_file)
+        offset = archive_file.tell()
+    shape, fortran_order, dtype = header
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        offset=offset,
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
+
+
+def open_target_array(
+    path: PathLike, columns: Optional[int] = None, key: Optional[str] = None
+) -> np.ndarray:
+    """Open a binary target file without reading it into memory.
+
+    Args:
+        path (PathLike): ``.npy``, ``.npz`` or ``.bin`` file.
+        columns (Optional[int]): Expected number of columns.
+                                 Required for ``.bin`` files.
+        key (Optional[str]): Array name inside a ``.npz`` archive.
+
+    Raises:
+        ValueError: If the file format is not supported or the data does not
+                    have the shape of a target array.
+
+    Returns:
+        np.ndarray: Read-only array of shape (N, columns). Members of a
+                    ``.npz`` archive are mapped when stored uncompressed
+                    (``np.savez``) and loaded when compressed
+                    (``np.savez_compressed``).
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".npy":
+        array = np.load(path, mmap_mode="r")
+    elif suffix == ".npz":
+        array = _open_npz_member(path, key)
+    elif suffix == ".bin":
+        if columns is None:
+            raise ValueError("Binary record files need an explicit column count")
+        array = np.memmap(path, dtype="<f8", mode="r")
+        if array.size % columns:
+            raise ValueError(f"File size is not a multiple of {columns} records")
+        array = array.reshape(-1, columns)
+    else:
+        raise ValueError("Unsupported target file format", path)
+    _check_shape(array, columns)
+    return array
+
+
+def valid_target_mask(
+    array: np.ndarray, workspace: Optional[Workspace] = None
+) -> np.ndarray:
+    """Vectorized counterpart of ``Arm.is_target_valid``.
+
+    A row is valid when every position and pose component is a finite number
+    and, if a workspace is given, every position in the row is allowed by it.
+
+    Args:
+        array (np.ndarray): Array of shape (N, 6) or (N, 12).
+        workspace (Optional[Workspace]): Workspace the positions must lie in.
+
+    Returns:
+        np.ndarray: Boolean mask of shape (N,).
+    """
+    _check_shape(array, None)
+    if not np.issubdtype(array.dtype, np.number):
+        return np.zeros(len(array), dtype=bool)
+    mask = np.isfinite(array).all(axis=1)
+    if workspace is not None:
+        for start in range(0, array.shape[1], TARGET_FIELDS):
+            mask &= workspace.allowed_mask(array[:, start : start + 3])
+    return mask
+
+
+def validate_target_array(
+    array: np.ndarray, offset: int = 0, workspace: Optional[Workspace] = None
+) -> None:
+    """Raise if any row of ``array`` is not a valid target.
+
+    Args:
+        array (np.ndarray): Array of shape (N, 6) or (N, 12).
+        offset (int): Index of the first row in the whole file,
+                      used in the error message.
+        workspace (Optional[Workspace]): Workspace the positions must lie in.
+
+    Raises:
+        ValueError: Listing the first invalid rows.
+    """
+    mask = valid_target_mask(array, workspace)
+    if not mask.all():
+        invalid_rows = np.flatnonzero(~mask)[:10] + offset
+        raise ValueError("Invalid target rows", invalid_rows.tolist())
+
+
+def _iter_csv_chunks(path: Path, chunk_size: int) -> Iterator[np.ndarray]:
+    with open(path) as manifest:
+        while True:
+            lines = list(islice(manifest, chunk_size))
+            if not lines:
+                return
+            chunk = np.loadtxt(lines, delimiter=",", comments="#", ndmin=2)
+            if chunk.size:
+                yield chunk
+
+
+def iter_target_chunks(
+    path: PathLike,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    columns: Optional[int] = None,
+    key: Optional[str] = None,
+    validate: bool = True,
+    workspace: Optional[Workspace] = None,
+) -> Iterator[np.ndarray]:
+    """Lazily yield a target file as 2-D arrays of at most ``chunk_size`` rows.
+
+    Chunks of memory-mapped files are views, so only the pages that are
+    actually touched are read from disk.
+
+    Args:
+        path (PathLike): Any supported target file.
+        chunk_size (int): Maximum rows per chunk.
+        columns (Optional[int]): Expected number of columns.
+        key (Optional[str]): Array name inside a ``.npz`` archive.
+        validate (bool): Check every chunk with ``validate_target_array``.
+        workspace (Optional[Workspace]): Workspace the validated positions
+                                         must lie in.
+
+    Raises:
+        ValueError: If the file is malformed or holds invalid targets.
+
+    Yields:
+        np.ndarray: Chunk of shape (n, columns).
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        chunks = _iter_csv_chunks(path, chunk_size)
+    else:
+        array = open_target_array(path, columns, key)
+        chunks = (
+            array[start : start + chunk_size]
+            for start in range(0, len(array), chunk_size)
+        )
+
+    offset = 0
+    for chunk in chunks:
+        _check_shape(chunk, columns)
+        if validate:
+            validate_target_array(chunk, offset, workspace)
+        offset += len(chunk)
+        yield chunk
+
+
+def iter_targets(path: PathLike, **kwargs) -> Iterator[Target]:
+    """Lazily yield a ``Target`` for every row of a single-target file.
+
+    Args:
+        path (PathLike): Target file with 6 columns.
+        **kwargs: Forwarded to ``iter_target_chunks``.
+
+    Yields:
+        Target: One target per row.
+    """
+    for chunk in iter_target_chunks(path, columns=TARGET_FIELDS, **kwargs):
+        for row in chunk:
+            yield Target.from_row(row)
+
+
+def iter_target_pairs(path: PathLike, **kwargs) -> Iterator[tuple[Target, Target]]:
+    """Lazily yield (pick, place) targets for every row of a pair file.
+
+    Args:
+        path (PathLike): Target file with 12 columns.
+        **kwargs: Forwarded to ``iter_target_chunks``.
+
+    Yields:
+        tuple[Target, Target]: Pick and place target of one job.
+    """
+    for chunk in iter_target_chunks(path, columns=PAIR_FIELDS, **kwargs):
+        for row in chunk:
+            yield (
+                Target.from_row(row[:TARGET_FIELDS]),
+                Target.from_row(row[TARGET_FIELDS:]),
+            )
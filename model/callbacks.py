@@ -0,0 +1,34 @@
+"""Helpers to add callbacks to the states of a running machine.
+
+``State`` keeps the callback lists of the definitions it was built from, and
+the machines of this package share those definitions at class level. The
+lists are therefore always replaced, never mutated, so adding a callback to
+one machine does not add it to every other machine of the same class.
+"""
+
+
+def set_callbacks(state, trigger: str, callbacks: list) -> None:
+    """Replace the ``on_<trigger>`` callbacks of a state.
+
+    Args:
+        state (transitions.State): State of a machine.
+        trigger (str): ``enter`` or ``exit``.
+        callbacks (list): New callbacks, copied.
+    """
+    setattr(state, "on_" + trigger, list(callbacks))
+
+
+def add_callback(state, trigger: str, callback, first: bool = False) -> None:
+    """Add a callback to the ``on_<trigger>`` callbacks of a state.
+
+    Args:
+        state (transitions.State): State of a machine.
+        trigger (str): ``enter`` or ``exit``.
+        callback: Callable or model method name.
+        first (bool): Run it before the existing callbacks.
+    """
+    callbacks = getattr(state, "on_" + trigger)
+    if first:
+        set_callbacks(state, trigger, [callback] + callbacks)
+    else:
+        set_callbacks(state, trigger, callbacks + [callback])
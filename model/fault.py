@@ -0,0 +1,111 @@
+"""Cooperative ``fault`` state shared by ``Arm`` and ``PickAndPlaceRobot``.
+
+A fault is only requested from outside, e.g. by a ``Watchdog`` timer. The
+machine takes the ``fault`` transition itself on its next pass through
+``execute_fsm``, and keeps a ``FaultReport`` of the state it was stuck in.
+"""
+
+from typing import NamedTuple, Optional
+
+
+def fault_state() -> dict:
+    """State definition of ``fault``, a new dict for every machine class."""
+    return {
+        "name": "fault",
+        "on_enter": [
+            "current_state",
+        ],
+    }
+
+
+def fault_transition(states: list) -> dict:
+    """Transition from every state but ``fault`` into ``fault``.
+
+    It is only allowed once a fault was requested, so the ``execute_fsm``
+    loops take it on their next pass and nothing else fires it.
+
+    Args:
+        states (list): State definitions of the machine.
+
+    Returns:
+        dict: Transition definition of the ``fault`` trigger.
+    """
+    return {
+        "trigger": "fault",
+        "source": [state["name"] for state in states if state["name"] != "fault"],
+        "dest": "fault",
+        "conditions": ["fault_requested"],
+        "before": ["record_fault"],
+    }
+
+
+class FaultReport(NamedTuple):
+    machine: str
+    state: str
+    reason: str
+    blocked: dict
+
+
+def blocked_conditions(model) -> dict:
+    """Evaluate the conditions of every trigger leaving the current state.
+
+    Args:
+        model: Model of a ``transitions`` Machine.
+
+    Returns:
+        dict: ``{trigger: {condition: value}}``. A condition that raised is
+              reported by its exception.
+    """
+    blocked = {}
+    machine = model.machine
+    for trigger in machine.get_triggers(model.state)[len(machine.states) :]:
+        if trigger == "fault":
+            continue
+        conditions = {}
+        for transition in machine.events[trigger].transitions[model.state]:
+            for condition in transition.conditions:
+                func = condition.func
+                name = func if isinstance(func, str) else func.__name__
+                try:
+                    value = getattr(model, func) if isinstance(func, str) else func
+                    conditions[name] = value() if callable(value) else value
+                except Exception as error:
+                    conditions[name] = error
+        blocked[trigger] = conditions
+    return blocked
+
+
+class FaultMixin(object):
+    """Fault handling shared by machines with a ``fault`` state.
+
+    ``request_fault`` may be called from any thread, the transition into
+    ``fault`` is then taken by the thread driving the machine.
+    """
+
+    _fault_reason: Optional[str] = None
+    fault_report: Optional[FaultReport] = None
+
+    @property
+    def fault_requested(self) -> bool:
+        return self._fault_reason is not None
+
+    def request_fault(self, reason: str) -> None:
+        """Ask the machine to go to ``fault`` on its next transition check.
+
+        Args:
+            reason (str): Why the fault was requested, kept in the report.
+        """
+        self._fault_reason = reason
+
+    def cancel_fault_request(self) -> None:
+        self._fault_reason = None
+
+    def record_fault(self) -> None:
+        """Store a ``FaultReport`` of the state the machine is leaving."""
+        self.fault_report = FaultReport(
+            type(self).__name__,
+            self.state,
+            self._fault_reason,
+            blocked_conditions(self),
+        )
+        self._fault_reason = None
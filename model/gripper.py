@@ -1,4 +1,5 @@
 import time
+from typing import Callable
 
 from transitions import Machine
 
@@ -52,7 +53,7 @@ class Gripper(object):
         },
     ]
 
-    def __init__(self) -> None:
+    def __init__(self, sleep: Callable[[float], None] = time.sleep) -> None:
         self.machine = Machine(
             model=self,
             states=Gripper.states,
@@ -61,6 +62,7 @@ class Gripper(object):
         )
 
         self._gripper_state = 0
+        self.sleep = sleep
 
     def opened(self) -> bool:
         """
@@ -96,7 +98,7 @@ class Gripper(object):
             None
         """
         print("Opening Gripper...\n")
-        time.sleep(1)
+        self.sleep(1)
         self._gripper_state = 0
 
     def closing_gripper(self):
@@ -106,7 +108,7 @@ class Gripper(object):
             None
         """
         print("Closing Gripper...\n")
-        time.sleep(1)
+        self.sleep(1)
         self._gripper_state = 1
 
 
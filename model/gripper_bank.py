@@ -0,0 +1,160 @@
+import time
+from typing import Callable, Sequence, Union
+
+import numpy as np
+from transitions.core import MachineError
+
+from model.gripper import Gripper
+
+Mask = Union[None, np.ndarray, Sequence[int], Sequence[bool]]
+
+
+class GripperBank(object):
+    """Array-backed model of N grippers on one end effector.
+
+    Follows the states, transitions and conditions of ``Gripper`` but keeps
+    the machine state and the gripper state of every gripper in NumPy arrays.
+    A trigger fires for all selected grippers at once and waits for a single
+    actuation, however many grippers move.
+    """
+
+    state_names = np.array([state["name"] for state in Gripper.states])
+    gripper_state_on_enter = {"opening": 0, "closing": 1}
+
+    def __init__(self, size: int, sleep: Callable[[float], None] = time.sleep) -> None:
+        self.size = size
+        self.sleep = sleep
+        self._state = np.zeros(size, dtype=np.int8)
+        self._gripper_state = np.zeros(size, dtype=np.int8)
+
+        codes = {name: code for code, name in enumerate(self.state_names)}
+        self._transitions = {}
+        for transition in Gripper.transitions:
+            sources = transition["source"]
+            sources = [sources] if isinstance(sources, str) else sources
+            self._transitions[transition["trigger"]] = (
+                np.array([codes[source] for source in sources]),
+                codes[transition["dest"]],
+                transition.get("conditions", []),
+            )
+
+    @property
+    def state(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Machine state name of every gripper.
+        """
+        return self.state_names[self._state]
+
+    def opened(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: True for every gripper that is opened.
+        """
+        return self._gripper_state == 0
+
+    def closed(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: True for every gripper that is closed.
+        """
+        return self._gripper_state == 1
+
+    def _select(self, mask: Mask) -> np.ndarray:
+        if mask is None:
+            return np.ones(self.size, dtype=bool)
+        array = np.asarray(mask)
+        if array.dtype == bool:
+            if array.shape != (self.size,):
+                raise ValueError("Boolean mask must have one value per gripper")
+            return array.copy()
+        # An empty list converts to float64, which is not a valid index.
+        selected = np.zeros(self.size, dtype=bool)
+        selected[np.asarray(mask, dtype=np.intp)] = True
+        return selected
+
+    def _may_trigger(self, trigger: str, selected: np.ndarray) -> np.ndarray:
+        sources, _, conditions = self._transitions[trigger]
+        allowed = selected & np.isin(self._state, sources)
+        for condition in conditions:
+            allowed &= getattr(self, condition)()
+        return allowed
+
+    def _trigger(self, trigger: str, mask: Mask) -> np.ndarray:
+        selected = self._select(mask)
+        sources, dest, _ = self._transitions[trigger]
+        invalid = selected & ~np.isin(self._state, sources)
+        if invalid.any():
+            raise MachineError(
+                f"Can't trigger event {trigger} for grippers "
+                f"{np.flatnonzero(invalid).tolist()} from states "
+                f"{sorted(set(self.state[invalid]))}!"
+            )
+        fire = self._may_trigger(trigger, selected)
+        if fire.any():
+            self._state[fire] = dest
+            self.current_state()
+            self.actuate(fire, self.gripper_state_on_enter[self.state_names[dest]])
+        return fire
+
+    def actuate(self, grippers: np.ndarray, gripper_state: int) -> None:
+        """Move the selected grippers together with a single wait.
+
+        Args:
+            grippers (np.ndarray): Boolean mask of the grippers to move.
+            gripper_state (int): 0 to open, 1 to close.
+        """
+        action = "Closing" if gripper_state else "Opening"
+        print(f"{action} Grippers {np.flatnonzero(grippers).tolist()}...\n")
+        self.sleep(1)
+        self._gripper_state[grippers] = gripper_state
+
+    def current_state(self) -> None:
+        """
+        Method to display the current state of the Machine.
+
+        Returns:
+            None
+        """
+        print(f"\nMachine GripperBank\nCurrent States: {self.state.tolist()}")
+
+    def reset(self, mask: Mask = None) -> np.ndarray:
+        """Fire ``reset`` for the selected grippers.
+
+        Args:
+            mask (Mask): Boolean mask or indices of the grippers.
+                         All grippers if None.
+
+        Raises:
+            MachineError: If a selected gripper cannot be reset from its state.
+
+        Returns:
+            np.ndarray: True for every gripper that transitioned.
+        """
+        return self._trigger("reset", mask)
+
+    def close(self, mask: Mask = None) -> np.ndarray:
+        """Fire ``close`` for the selected opened grippers. See ``reset``."""
+        return self._trigger("close", mask)
+
+    def open(self, mask: Mask = None) -> np.ndarray:
+        """Fire ``open`` for the selected closed grippers. See ``reset``."""
+        return self._trigger("open", mask)
+
+    def may_reset(self, mask: Mask = None) -> np.ndarray:
+        return self._may_trigger("reset", self._select(mask))
+
+    def may_close(self, mask: Mask = None) -> np.ndarray:
+        return self._may_trigger("close", self._select(mask))
+
+    def may_open(self, mask: Mask = None) -> np.ndarray:
+        return self._may_trigger("open", self._select(mask))
+
+
+if __name__ == "__main__":
+    bank = GripperBank(8)
+    bank.reset()
+    bank.close([0, 2, 4, 6])
+    assert bank.closed().tolist() == [True, False] * 4
+    bank.open(bank.closed())
+    assert bank.opened().all(), "Grippers should be opened"
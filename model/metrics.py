@@ -0,0 +1,347 @@
+"""Fleet metrics for PickAndPlaceRobot machines.
+
+``MetricsRegistry.attach`` adds enter and exit callbacks to every state of a
+robot. The callbacks only bump counters in a shard owned by the calling
+thread, so robots running on different threads never contend for a lock.
+``snapshot`` merges the shards into a plain dict. The shard of a thread that
+ended is folded into a retired total, so short-lived threads do not pile up.
+A robot that is detached or garbage collected counts as leaving its state,
+so it no longer adds to the occupancy.
+Snapshots written by other processes (``MetricsRegistry.dump``) are combined
+with ``merge_snapshots`` and exposed in the Prometheus text format, either as
+a file for a textfile collector or over a local HTTP endpoint.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterable, Union
+
+from model.callbacks import add_callback, set_callbacks
+from model.pick_and_place import PickAndPlaceRobot
+
+LATENCY_BUCKETS = tuple(0.001 * 2**exponent for exponent in range(23))
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class _Shard(object):
+    """Counters written by a single thread."""
+
+    __slots__ = ("entries", "exits", "latency_buckets", "latency_sum")
+
+    def __init__(self) -> None:
+        self.entries = {}
+        self.exits = {}
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def add(self, other: "_Shard") -> None:
+        for state, count in dict(other.entries).items():
+            self.entries[state] = self.entries.get(state, 0) + count
+        for state, count in dict(other.exits).items():
+            self.exits[state] = self.exits.get(state, 0) + count
+        self.latency_buckets = [
+            total + count
+            for total, count in zip(self.latency_buckets, other.latency_buckets)
+        ]
+        self.latency_sum += other.latency_sum
+
+
+class _ShardOwner(object):
+    """Thread-local handle whose collection retires the thread's shard."""
+
+
+class MetricsRegistry(object):
+    """Per-state counters, throughput, retry ratio and cycle latency of
+    every attached robot.
+
+    Args:
+        clock (Callable[[], float]): Monotonic clock used for latencies.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.started = clock()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = _Shard()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            # Thread-local values are released when their thread ends.
+            self._local.owner = _ShardOwner()
+            weakref.finalize(self._local.owner, self._retire, shard)
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _retire(self, shard: _Shard) -> None:
+        with self._lock:
+            self._shards.remove(shard)
+            self._retired.add(shard)
+
+    def _count_exit(self, location: list) -> None:
+        shard = self._shard()
+        shard.exits[location[0]] = shard.exits.get(location[0], 0) + 1
+
+    def _on_enter(self, robot: PickAndPlaceRobot, state: str) -> Callable:
+        def count_entry(*_, **__) -> None:
+            robot._metrics_location[0] = state
+            shard = self._shard()
+            shard.entries[state] = shard.entries.get(state, 0) + 1
+            if state == "finished" and robot._metrics_cycle_start is not None:
+                latency = self.clock() - robot._metrics_cycle_start
+                robot._metrics_cycle_start = None
+                bucket = bisect.bisect_left(LATENCY_BUCKETS, latency)
+                shard.latency_buckets[bucket] += 1
+                shard.latency_sum += latency
+
+        return count_entry
+
+    def _on_exit(self, robot: PickAndPlaceRobot, state: str) -> Callable:
+        def count_exit(*_, **__) -> None:
+            shard = self._shard()
+            shard.exits[state] = shard.exits.get(state, 0) + 1
+            if state == "idle":
+                robot._metrics_cycle_start = self.clock()
+
+        return count_exit
+
+    def attach(self, robot: PickAndPlaceRobot) -> None:
+        """Feed the registry from the state callbacks of a robot.
+
+        A cycle starts when the robot leaves ``idle`` and completes when it
+        enters ``finished``. The robot leaves its state when it is detached
+        or garbage collected.
+        """
+        robot._metrics_cycle_start = None
+        # State the robot is in, kept apart so the finalizer can read it.
+        robot._metrics_location = [robot.state]
+        robot._metrics_callbacks = {}
+        for name, state in robot.machine.states.items():
+            callbacks = (self._on_enter(robot, name), self._on_exit(robot, name))
+            add_callback(state, "enter", callbacks[0])
+            add_callback(state, "exit", callbacks[1])
+            robot._metrics_callbacks[name] = callbacks
+        self._on_enter(robot, robot.state)()
+        robot._metrics_finalizer = weakref.finalize(
+            robot, self._count_exit, robot._metrics_location
+        )
+
+    def detach(self, robot: PickAndPlaceRobot) -> None:
+        """Stop counting a robot and count it as leaving its current state."""
+        robot._metrics_finalizer()
+        for name, state in robot.machine.states.items():
+            on_enter, on_exit = robot._metrics_callbacks[name]
+            set_callbacks(
+                state, "enter", [c for c in state.on_enter if c is not on_enter]
+            )
+            set_callbacks(state, "exit", [c for c in state.on_exit if c is not on_exit])
+
+    def snapshot(self) -> dict:
+        """Merge the counters of every thread.
+
+        ``throughput`` is a lifetime average, the completed cycles divided by
+        the time since the registry was created. For a rate over a recent
+        window, take the difference of ``entries["finished"]`` between two
+        snapshots, e.g. ``rate(pick_and_place_completed_total[5m])``.
+
+        Returns:
+            dict: JSON serializable snapshot, see ``merge_snapshots``.
+        """
+        total = _Shard()
+        with self._lock:
+            total.add(self._retired)
+            for shard in self._shards:
+                total.add(shard)
+        uptime = self.clock() - self.started
+        completed = total.entries.get("finished", 0)
+        return {
+            "entries": total.entries,
+            "exits": total.exits,
+            "latency_buckets": total.latency_buckets,
+            "latency_sum": total.latency_sum,
+            "throughput": completed / uptime if uptime > 0 else 0.0,
+        }
+
+    def dump(self, path: Union[str, Path]) -> None:
+        """Atomically write the snapshot as JSON, e.g. one file per process."""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(temporary, path)
+
+
+def merge_snapshots(snapshots: Iterable[dict]) -> dict:
+    """Add up snapshots of several registries, e.g. one per process.
+
+    Args:
+        snapshots (Iterable[dict]): Results of ``MetricsRegistry.snapshot``.
+
+    Returns:
+        dict: Snapshot with summed counters and summed throughput.
+    """
+    merged = {
+        "entries": {},
+        "exits": {},
+        "latency_buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+        "latency_sum": 0.0,
+        "throughput": 0.0,
+    }
+    for snapshot in snapshots:
+        for key in ("entries", "exits"):
+            for state, count in snapshot[key].items():
+                merged[key][state] = merged[key].get(state, 0) + count
+        merged["latency_buckets"] = [
+            total + count
+            for total, count in zip(
+                merged["latency_buckets"], snapshot["latency_buckets"]
+            )
+        ]
+        merged["latency_sum"] += snapshot["latency_sum"]
+        merged["throughput"] += snapshot["throughput"]
+    return merged
+
+
+def load_snapshots(directory: Union[str, Path]) -> list:
+    """Read every ``*.json`` snapshot written by ``MetricsRegistry.dump``."""
+    snapshots = []
+    for path in sorted(Path(directory).glob("*.json")):
+        with open(path) as snapshot_file:
+            snapshots.append(json.load(snapshot_file))
+    return snapshots
+
+
+def latency_quantile(snapshot: dict, quantile: float) -> float:
+    """Estimate a cycle latency quantile from the histogram of a snapshot.
+
+    Returns:
+        float: Upper bound of the bucket holding the quantile, NaN if no
+               cycle completed yet.
+    """
+    buckets = snapshot["latency_buckets"]
+    total = sum(buckets)
+    if not total:
+        return float("nan")
+    rank, cumulative = quantile * total, 0
+    for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+        cumulative += count
+        if cumulative >= rank:
+            return bound
+    return float("inf")
+
+
+def occupancy(snapshot: dict) -> dict:
+    """
+    Returns:
+        dict: Number of attached robots currently in each state.
+    """
+    return {
+        state: count - snapshot["exits"].get(state, 0)
+        for state, count in snapshot["entries"].items()
+    }
+
+
+def retry_ratio(snapshot: dict) -> float:
+    """
+    Returns:
+        float: Retries per entry into ``pick``.
+    """
+    picks = snapshot["entries"].get("pick", 0)
+    return snapshot["entries"].get("retry", 0) / picks if picks else 0.0
+
+
+def render_prometheus(snapshot: dict) -> str:
+    """Format a snapshot in the Prometheus text exposition format."""
+    lines = ["# TYPE pick_and_place_state_occupancy gauge"]
+    for state, count in sorted(occupancy(snapshot).items()):
+        lines.append(f'pick_and_place_state_occupancy{{state="{state}"}} {count}')
+    lines.append("# TYPE pick_and_place_state_entries_total counter")
+    for state, count in sorted(snapshot["entries"].items()):
+        lines.append(f'pick_and_place_state_entries_total{{state="{state}"}} {count}')
+    completed = snapshot["entries"].get("finished", 0)
+    lines += [
+        "# TYPE pick_and_place_completed_total counter",
+        f"pick_and_place_completed_total {completed}",
+        "# TYPE pick_and_place_throughput_per_second gauge",
+        f"pick_and_place_throughput_per_second {snapshot['throughput']}",
+        "# TYPE pick_and_place_retry_ratio gauge",
+        f"pick_and_place_retry_ratio {retry_ratio(snapshot)}",
+        "# TYPE pick_and_place_cycle_seconds summary",
+    ]
+    for quantile in QUANTILES:
+        value = latency_quantile(snapshot, quantile)
+        lines.append(f'pick_and_place_cycle_seconds{{quantile="{quantile}"}} {value}')
+    lines += [
+        f"pick_and_place_cycle_seconds_sum {snapshot['latency_sum']}",
+        f"pick_and_place_cycle_seconds_count {sum(snapshot['latency_buckets'])}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: Union[str, Path], snapshot: dict) -> None:
+    """Atomically write a snapshot for a Prometheus textfile collector."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as metrics_file:
+        metrics_file.write(render_prometheus(snapshot))
+    os.replace(temporary, path)
+
+
+def serve_http(
+    collect: Callable[[], dict], port: int = 9464, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """Serve ``render_prometheus(collect())`` on ``/metrics`` from a daemon
+    thread.
+
+    Args:
+        collect (Callable[[], dict]): Returns the snapshot to expose, e.g.
+                                      ``registry.snapshot``.
+        port (int): TCP port, 0 picks a free one.
+        host (str): Interface to bind to.
+
+    Returns:
+        ThreadingHTTPServer: Running server, stop it with ``shutdown()``.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus(collect()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import sys
+
+    snapshots_directory = sys.argv[1]
+    if len(sys.argv) > 2:
+        server = serve_http(
+            lambda: merge_snapshots(load_snapshots(snapshots_directory)),
+            int(sys.argv[2]),
+        )
+        print(f"Serving metrics on http://127.0.0.1:{server.server_port}/metrics")
+        threading.Event().wait()
+    else:
+        snapshot = merge_snapshots(load_snapshots(snapshots_directory))
+        print(render_prometheus(snapshot), end="")
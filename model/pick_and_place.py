@@ -1,13 +1,19 @@
 import random
+import time
+from typing import TYPE_CHECKING, Callable, Optional
 
 from transitions import Machine
 
 from model.arm import Arm
+from model.fault import FaultMixin, fault_state, fault_transition
 from model.gripper import Gripper
 from model.utils import Target
 
+if TYPE_CHECKING:
+    from model.workspace import Workspace
 
-class PickAndPlaceRobot(object):
+
+class PickAndPlaceRobot(FaultMixin):
 
     states = [
         {
@@ -61,6 +67,7 @@ class PickAndPlaceRobot(object):
                 "current_state",
             ],
         },
+        fault_state(),
     ]
 
     transitions = [
@@ -111,9 +118,22 @@ class PickAndPlaceRobot(object):
             "dest": "idle",
             "conditions": ["errors_occurred"],
         },
+        {
+            "trigger": "clear_fault",
+            "source": "fault",
+            "dest": "idle",
+        },
+        fault_transition(states),
     ]
 
-    def __init__(self, pick_target: Target, place_target: Target) -> None:
+    def __init__(
+        self,
+        pick_target: Target,
+        place_target: Target,
+        workspace: Optional["Workspace"] = None,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
         self.machine = Machine(
             model=self,
             states=PickAndPlaceRobot.states,
@@ -121,8 +141,9 @@ class PickAndPlaceRobot(object):
             initial="idle",
         )
 
-        self.gripper = Gripper()
-        self.arm = Arm()
+        self.gripper = Gripper(sleep)
+        self.arm = Arm(workspace, sleep)
+        self.rng = random if rng is None else rng
 
         self._tries = None
         self._can_retry = None
@@ -131,6 +152,7 @@ class PickAndPlaceRobot(object):
         self._picking_error = None
         self._object_picked = None
         self._object_placed = None
+        self._arm_move = None
 
         self.reset_attributes()
 
@@ -156,6 +178,7 @@ class PickAndPlaceRobot(object):
         self._picking_error = False
         self._object_picked = False
         self._object_placed = False
+        self._arm_move = None
 
     @property
     def pick_target(self) -> Target:
@@ -199,14 +222,32 @@ class PickAndPlaceRobot(object):
     def set_place_target(self) -> None:
         self.arm.set_target(self.place_target.position, self.place_target.pose)
 
+    def set_targets(self, pick_target: Target, place_target: Target) -> None:
+        """Replace the pick and place targets used from the next ``idle``."""
+        self._pick_target = pick_target
+        self._place_target = place_target
+
+    def request_fault(self, reason: str) -> None:
+        """Request a fault of the robot and of the Arm it may be waiting on."""
+        super().request_fault(reason)
+        self.arm.request_fault(reason)
+
+    def cancel_fault_request(self) -> None:
+        super().cancel_fault_request()
+        self.arm.cancel_fault_request()
+
+    def record_fault(self) -> None:
+        super().record_fault()
+        self.arm.cancel_fault_request()
+
     def add_try(self) -> None:
         self._tries += 1
 
     def open_gripper(self) -> None:
         self.gripper.reset()
         self._object_picked = False
-        if self.arm.is_posed and self.arm.target_position == self.place_target.position:
-            chance = random.randint(0, 1)
+        if self.arm.is_posed and self._arm_move == "place":
+            chance = self.rng.randint(0, 1)
             if chance < 0.8:
                 self._object_placed = True
             else:
@@ -215,9 +256,9 @@ class PickAndPlaceRobot(object):
 
     def close_gripper(self) -> None:
         self.gripper.close()
-        if self.arm.is_posed and self.arm.target_position == self.pick_target.position:
+        if self.arm.is_posed and self._arm_move == "pick":
             self._object_placed = False
-            chance = random.randint(0, 1)
+            chance = self.rng.randint(0, 1)
             if chance < 0.8:
                 self._object_picked = True
             else:
@@ -225,14 +266,24 @@ class PickAndPlaceRobot(object):
                 self._picking_error = True
                 self._errors_occurred = True
 
+    def _move_arm(self, move: str, target: Target) -> None:
+        # After a previous move the Arm waits in ``finish`` and would not
+        # move again without a reset cycle.
+        if self.arm.state != "idle":
+            self.arm.reset()
+        # The gripper checks follow the move rather than its target, which
+        # ``Arm.retarget`` may change while the Arm is moving.
+        self._arm_move = move
+        self.arm.execute(target.position, target.pose)
+
     def moving_to_pick_position(self) -> None:
-        self.arm.execute(self.pick_target.position, self.pick_target.pose)
+        self._move_arm("pick", self.pick_target)
 
     def moving_to_place_position(self) -> None:
-        self.arm.execute(self.place_target.position, self.place_target.pose)
+        self._move_arm("place", self.place_target)
 
     def execute_fsm(self) -> None:
-        while self.state != "finished":
+        while self.state not in ("finished", "fault"):
             available_transitions = self.machine.get_triggers(self.state)
             available_transitions = available_transitions[len(self.states) :]
             for current_transition in range(len(available_transitions)):
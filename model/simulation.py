@@ -0,0 +1,314 @@
+"""Discrete-event simulation of pick and place cells.
+
+Robots are the regular ``PickAndPlaceRobot``, ``Arm`` and ``Gripper``
+machines. Their ``sleep`` hooks are replaced by a virtual clock, so an
+actuation only advances simulated time. One event is one robot level
+trigger, and events of all robots are processed in time order from a heap.
+
+Every trigger runs through the ``transitions`` machinery, Arm and Gripper
+triggers included, at about 15 µs each on one core. A job takes about 25
+triggers, so an 8 hour shift of 50 robots, about 52,000 jobs and 1.3 million
+triggers, takes about 20 s. A few seconds would need a machine engine other
+than ``transitions``. ``benchmarks/simulation.py`` checks the shift against
+a 30 s budget.
+"""
+
+import heapq
+import math
+import os
+import random
+from contextlib import redirect_stdout
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from model.arm import Arm
+from model.pick_and_place import PickAndPlaceRobot
+from model.utils import Position, Target
+
+IDLE_STATES = ("idle", "finished", "abort", "recovery")
+
+
+class ArmMotion(object):
+    """Virtual ``sleep`` of an Arm, timed from the travelled distance.
+
+    Args:
+        arm (Arm): Arm whose state and targets define the motion.
+        cell (SimulatedCell): Cell whose clock is advanced.
+        speed (float): Travel speed in distance units per second.
+        pose_seconds (float): Time to reach a new pose.
+        stop_seconds (float): Time to stop the Arm.
+        home (Position): Position of the Arm before its first move.
+    """
+
+    def __init__(
+        self,
+        arm: Arm,
+        cell: "SimulatedCell",
+        speed: float,
+        pose_seconds: float,
+        stop_seconds: float,
+        home: Position,
+    ) -> None:
+        self.arm = arm
+        self.cell = cell
+        self.speed = speed
+        self.pose_seconds = pose_seconds
+        self.stop_seconds = stop_seconds
+        self.home = home
+
+    def __call__(self, _: float) -> None:
+        if self.arm.state == "go_to_position":
+            start = self.arm.current_position or self.home
+            end = self.arm.target_position
+            distance = math.dist((start.x, start.y, start.z), (end.x, end.y, end.z))
+            self.cell.elapsed += distance / self.speed
+        elif self.arm.state == "pose":
+            self.cell.elapsed += self.pose_seconds
+        else:
+            self.cell.elapsed += self.stop_seconds
+
+
+class SimulatedCell(object):
+    """One robot of the simulated fleet and its bookkeeping."""
+
+    def __init__(self, index: int, seed: int) -> None:
+        self.index = index
+        self.rng = random.Random(seed)
+        self.robot = None
+        self.elapsed = 0.0
+        self.completed = 0
+        self.failed = 0
+        self.state_seconds = {}
+
+
+class CellReport(NamedTuple):
+    index: int
+    completed: int
+    failed: int
+    utilization: float
+    state_seconds: dict
+
+
+class SimulationReport(NamedTuple):
+    horizon: float
+    completed: int
+    failed: int
+    throughput_per_hour: float
+    utilization: float
+    cells: list
+
+
+class Simulation(object):
+    """Time-compressed simulation of a fleet of pick and place robots.
+
+    A job fails when its robot has no allowed trigger left or exceeds
+    ``max_tries`` picks. The robot then spends ``recovery_seconds`` in the
+    ``recovery`` pseudo state and moves on to the next job. With the outcome
+    model of ``PickAndPlaceRobot`` most jobs fail: each pick and place
+    succeeds with a fair coin, the retries of a failed pick fail as well and
+    a failed place leaves the robot without allowed trigger.
+
+    Args:
+        jobs (Iterable[tuple[Target, Target]]): (pick, place) targets, taken
+            by whichever robot is free first. ``iter_target_pairs`` output
+            works as is. A robot without a job stops.
+        robots (int): Number of robots in the cell.
+        seed (Optional[int]): Seed of the random pick and place outcomes.
+        speed (float): Arm travel speed in distance units per second.
+        pose_seconds (float): Time the Arm takes to pose.
+        stop_seconds (float): Time the Arm takes to stop.
+        gripper_seconds (float): Time a gripper takes to open or close.
+        max_tries (int): Failed picks after which a job is given up.
+        recovery_seconds (float): Time lost by giving up a job.
+        home (Position): Start position of every Arm.
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[tuple[Target, Target]],
+        robots: int,
+        seed: Optional[int] = None,
+        speed: float = 1.0,
+        pose_seconds: float = 0.5,
+        stop_seconds: float = 0.2,
+        gripper_seconds: float = 0.5,
+        max_tries: int = 3,
+        recovery_seconds: float = 30.0,
+        home: Position = Position(0.0, 0.0, 0.0),
+    ) -> None:
+        self.jobs = iter(jobs)
+        seeds = random.Random(seed)
+        self.cells = [
+            SimulatedCell(index, seeds.getrandbits(64)) for index in range(robots)
+        ]
+        self.speed = speed
+        self.pose_seconds = pose_seconds
+        self.stop_seconds = stop_seconds
+        self.gripper_seconds = gripper_seconds
+        self.max_tries = max_tries
+        self.recovery_seconds = recovery_seconds
+        self.home = home
+        self.now = 0.0
+        self._events = []
+        self._triggers = {}
+
+    def _gripper_sleep(self, cell: SimulatedCell):
+        def sleep(_: float) -> None:
+            cell.elapsed += self.gripper_seconds
+
+        return sleep
+
+    def _load_next_job(self, cell: SimulatedCell) -> bool:
+        """Hand the next job to a cell, reusing its robot through ``idle``.
+
+        Returns:
+            bool: False if there are no jobs left.
+        """
+        job = next(self.jobs, None)
+        if job is None:
+            return False
+        if cell.robot is None:
+            robot = PickAndPlaceRobot(
+                *job, rng=cell.rng, sleep=self._gripper_sleep(cell)
+            )
+            robot.arm.sleep = ArmMotion(
+                robot.arm,
+                cell,
+                self.speed,
+                self.pose_seconds,
+                self.stop_seconds,
+                self.home,
+            )
+            cell.robot = robot
+        else:
+            cell.robot.set_targets(*job)
+            cell.robot.to_idle()
+        return True
+
+    def _step(self, cell: SimulatedCell) -> Optional[float]:
+        """Advance a robot by one trigger, like one pass of ``execute_fsm``.
+
+        Returns:
+            Optional[float]: Simulated duration of the step, None once the
+                             robot has no jobs left.
+        """
+        robot = cell.robot
+        cell.elapsed = 0.0
+        if robot.state == "finished":
+            cell.completed += 1
+            if not self._load_next_job(cell):
+                return None
+            self._account(cell, "idle", cell.elapsed)
+            return cell.elapsed
+
+        if robot.tries < self.max_tries:
+            triggers = self._triggers.get(robot.state)
+            if triggers is None:
+                triggers = robot.machine.get_triggers(robot.state)[len(robot.states) :]
+                self._triggers[robot.state] = triggers
+            # A trigger whose conditions fail returns False, checking them
+            # first with ``may_*`` would scan the events of the machine again.
+            for trigger in triggers:
+                if getattr(robot, trigger)():
+                    self._account(cell, robot.state, cell.elapsed)
+                    return cell.elapsed
+
+        cell.failed += 1
+        if not self._load_next_job(cell):
+            return None
+        cell.elapsed += self.recovery_seconds
+        self._account(cell, "recovery", cell.elapsed)
+        return cell.elapsed
+
+    def _account(self, cell: SimulatedCell, state: str, seconds: float) -> None:
+        cell.state_seconds[state] = cell.state_seconds.get(state, 0.0) + seconds
+
+    def run(self, horizon: float, quiet: bool = True) -> SimulationReport:
+        """Simulate until ``horizon`` seconds of simulated time.
+
+        Args:
+            horizon (float): Simulated duration, e.g. ``8 * 3600`` for a shift.
+            quiet (bool): Discard what the machines print.
+
+        Returns:
+            SimulationReport: Fleet throughput and per-robot utilization.
+        """
+        if not quiet:
+            return self._run(horizon)
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            return self._run(horizon)
+
+    def _run(self, horizon: float) -> SimulationReport:
+        for cell in self.cells:
+            if self._load_next_job(cell):
+                heapq.heappush(self._events, (self.now, cell.index))
+
+        while self._events and self._events[0][0] < horizon:
+            self.now, index = heapq.heappop(self._events)
+            duration = self._step(self.cells[index])
+            if duration is not None:
+                heapq.heappush(self._events, (self.now + duration, index))
+        return self.report(horizon)
+
+    def report(self, horizon: float) -> SimulationReport:
+        """Summarize the simulation up to ``horizon``.
+
+        The last step of a robot may end after ``horizon``, so state times
+        can slightly exceed it. Throughput and utilization are 0 for a zero
+        ``horizon``.
+        """
+        cells = []
+        for cell in self.cells:
+            busy = sum(
+                seconds
+                for state, seconds in cell.state_seconds.items()
+                if state not in IDLE_STATES
+            )
+            cells.append(
+                CellReport(
+                    cell.index,
+                    cell.completed,
+                    cell.failed,
+                    min(busy / horizon, 1.0) if horizon > 0 else 0.0,
+                    dict(cell.state_seconds),
+                )
+            )
+        completed = sum(cell.completed for cell in cells)
+        return SimulationReport(
+            horizon,
+            completed,
+            sum(cell.failed for cell in cells),
+            completed / (horizon / 3600) if horizon > 0 else 0.0,
+            sum(cell.utilization for cell in cells) / len(cells) if cells else 0.0,
+            cells,
+        )
+
+
+def random_jobs(
+    seed: Optional[int] = None, extent: float = 2.0
+) -> Iterator[tuple[Target, Target]]:
+    """Endless (pick, place) pairs with positions in a cube of side ``extent``."""
+    rng = random.Random(seed)
+    while True:
+        yield tuple(
+            Target.from_floats(
+                *(rng.uniform(0.0, extent) for _ in range(3)), 0.0, 0.0, 0.0
+            )
+            for _ in range(2)
+        )
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    robots = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 8.0
+    start = time.perf_counter()
+    report = Simulation(random_jobs(seed=0), robots, seed=0).run(hours * 3600)
+    wall = time.perf_counter() - start
+    print(f"Simulated {robots} robots for {hours:g} h in {wall:.2f} s")
+    print(
+        f"Completed cycles: {report.completed} "
+        f"({report.throughput_per_hour:.1f} per hour)"
+    )
+    print(f"Failed jobs: {report.failed}, mean utilization: {report.utilization:.1%}")
@@ -0,0 +1,563 @@
+"""Record and replay transition traces of a PickAndPlaceRobot.
+
+A trace is an append-only text file with one compact JSON array per line:
+
+    ["C", pick, place]                             start of a cycle
+    ["T", machine, trigger, source, result, secs]  trigger call
+    ["M", machine, trigger, source, result]        ``may_<trigger>`` check
+    ["K", machine, condition, result]              condition check
+    ["R", method, args, value]                     random draw
+    ["B", machine, callback, secs]                 state callback duration
+    ["F", machine, reason]                         fault request
+    ["P", length, count]                           repeated checks
+    ["E", state, secs]                             end of a cycle
+
+``pick`` and ``place`` are ``Target.as_row`` tuples. ``machine`` is one of
+``robot``, ``arm`` or ``gripper``. Nested records are written when the call
+returns, so a trigger follows the records of the callbacks it ran. Only the
+callbacks a machine defines itself are timed, not those added by a
+``Watchdog`` or a ``MetricsRegistry``.
+
+A machine spinning without an allowed trigger checks the same conditions
+over and over. Such a run of ``M`` and ``K`` records is written once,
+followed by a ``P`` record telling how many more times its last ``length``
+records were repeated. ``TraceRecorder.flush`` writes the run seen so far,
+so a run may be split over several ``P`` records.
+
+Records carry no robot identifier. A recorder may trace several robots one
+cycle after the other, but cycles must not overlap: give every robot that
+runs concurrently its own recorder and trace file.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional, Union
+
+from model.callbacks import set_callbacks
+from model.pick_and_place import PickAndPlaceRobot
+from model.utils import Target
+
+_TIMED_FIELDS = {"T": 5, "B": 3, "E": 2}
+# Longest run of checks kept in memory while looking for its repetition.
+_MAX_PENDING_CHECKS = 1024
+
+
+class TraceDivergenceError(ValueError):
+    """Raised when a replay does not follow the recorded trace."""
+
+
+def _no_sleep(_: float) -> None:
+    pass
+
+
+class _Repeats:
+    """Collapses repeated passes over the same ``M`` and ``K`` records.
+
+    The first record of a run starts a candidate pass, which ends at the
+    next occurrence of that record. The pass grows whenever its first
+    repetition does not match.
+    """
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self.unit = []
+        self.count = 0
+        self.position = 0
+        self.closed = False
+
+    def push(self, record: list) -> list:
+        """Add a check record.
+
+        Returns:
+            list: Records that can be written now.
+        """
+        if not self.closed:
+            if not self.unit or record != self.unit[0]:
+                self.unit.append(record)
+                return []
+            self.closed = True
+        if record == self.unit[self.position]:
+            self.position += 1
+            if self.position == len(self.unit):
+                self.count += 1
+                self.position = 0
+            return []
+        if not self.count:
+            self.unit += self.unit[: self.position]
+            self.closed = False
+            self.position = 0
+            return self.push(record)
+
+        written = self.unit + [["P", len(self.unit), self.count]]
+        pending = self.unit[: self.position] + [record]
+        self._reset()
+        for check in pending:
+            written += self.push(check)
+        return written
+
+    def drain(self) -> list:
+        """Return and forget every record that was not written yet."""
+        written = list(self.unit)
+        if self.count:
+            written.append(["P", len(self.unit), self.count])
+        written += self.unit[: self.position]
+        self._reset()
+        return written
+
+
+def _expand(records: list) -> list:
+    """Undo the collapsing of repeated checks."""
+    expanded = []
+    for record in records:
+        if record[0] == "P":
+            expanded += expanded[-record[1] :] * record[2]
+        else:
+            expanded.append(record)
+    return expanded
+
+
+class _RecordedRandom:
+    """Proxy of a random source that records every draw."""
+
+    def __init__(self, rng, recorder: "TraceRecorder") -> None:
+        self._rng = rng
+        self._recorder = recorder
+
+    def __getattr__(self, name: str):
+        method = getattr(self._rng, name)
+
+        def draw(*args):
+            value = method(*args)
+            self._recorder.record("R", name, list(args), value)
+            return value
+
+        return draw
+
+
+class _ReplayedRandom:
+    """Random source that hands out the draws of a recorded cycle."""
+
+    def __init__(self, draws: list) -> None:
+        self._draws = iter(draws)
+
+    def __getattr__(self, name: str):
+        def draw(*args):
+            recorded = next(self._draws, None)
+            if recorded is None or recorded[1:3] != [name, list(args)]:
+                raise TraceDivergenceError("Unexpected random draw", name, args)
+            return recorded[3]
+
+        return draw
+
+
+class _RecordedCondition:
+    """Wraps a ``transitions`` condition and records its result."""
+
+    def __init__(self, condition, recorder: "TraceRecorder", machine: str) -> None:
+        self._condition = condition
+        self._recorder = recorder
+        self._machine = machine
+
+    def __getattr__(self, name: str):
+        return getattr(self._condition, name)
+
+    def check(self, event_data) -> bool:
+        result = self._condition.check(event_data)
+        func = self._condition.func
+        name = func if isinstance(func, str) else func.__name__
+        self._recorder.record("K", self._machine, name, result)
+        return result
+
+
+class TraceRecorder:
+    """Append-only recorder of triggers, conditions, random draws and
+    callback durations.
+
+    Args:
+        trace (Union[str, Path, object]): Path of the trace file, opened in
+                                          append mode, or a writable stream.
+    """
+
+    def __init__(self, trace: Union[str, Path, object]) -> None:
+        if isinstance(trace, (str, Path)):
+            self._stream = open(trace, "a")
+            self._owns_stream = True
+        else:
+            self._stream = trace
+            self._owns_stream = False
+        # Fault requests arrive from timer threads.
+        self._lock = threading.RLock()
+        self._repeats = _Repeats()
+        self._requesting_fault = False
+        self._cycle_robot = None
+
+    def record(self, *fields) -> None:
+        with self._lock:
+            record = list(fields)
+            if record[0] in ("M", "K"):
+                written = self._repeats.push(record)
+                if len(self._repeats.unit) > _MAX_PENDING_CHECKS:
+                    written += self._repeats.drain()
+            else:
+                written = self._repeats.drain() + [record]
+            for record in written:
+                self._write(record)
+
+    def _write(self, record: list) -> None:
+        self._stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def flush(self) -> None:
+        """Write the pending run of repeated checks and flush the stream."""
+        with self._lock:
+            for record in self._repeats.drain():
+                self._write(record)
+            self._stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._owns_stream:
+            self._stream.close()
+
+    def _timed_trigger(self, model, machine: str, trigger: str) -> Callable:
+        method = getattr(model, trigger)
+
+        def traced(*args, **kwargs):
+            source = model.state
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as error:
+                result = type(error).__name__
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                self.record("T", machine, trigger, source, result, elapsed)
+            return result
+
+        return traced
+
+    def _checked_trigger(self, model, machine: str, trigger: str) -> Callable:
+        method = getattr(model, "may_" + trigger)
+
+        def traced(*args, **kwargs):
+            source = model.state
+            result = method(*args, **kwargs)
+            self.record("M", machine, trigger, source, result)
+            return result
+
+        return traced
+
+    def _requested_fault(self, model, machine: str) -> Callable:
+        method = model.request_fault
+
+        def traced(reason: str) -> None:
+            with self._lock:
+                # A robot passes its request on to its Arm, only the
+                # outermost request is replayed.
+                if self._requesting_fault:
+                    return method(reason)
+                self._requesting_fault = True
+                try:
+                    self.record("F", machine, reason)
+                    method(reason)
+                finally:
+                    self._requesting_fault = False
+
+        return traced
+
+    def _timed_callback(self, model, machine: str, callback: str) -> Callable:
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                getattr(model, callback)(*args, **kwargs)
+            finally:
+                self.record("B", machine, callback, time.perf_counter() - start)
+
+        return traced
+
+    def instrument(self, model, machine: str) -> None:
+        """Wrap the triggers, conditions and state callbacks of one model.
+
+        Callbacks given as method names are timed, callables added by
+        other tools are left alone.
+
+        Args:
+            model: Model of a single ``transitions`` Machine.
+            machine (str): Name written to the trace for this model.
+
+        Raises:
+            ValueError: If the model is already instrumented.
+        """
+        if getattr(model, "_trace_recorder", None) is not None:
+            raise ValueError("Model is already traced", model)
+        model._trace_recorder = self
+
+        for trigger, event in model.machine.events.items():
+            if trigger in vars(model):
+                setattr(model, trigger, self._timed_trigger(model, machine, trigger))
+                setattr(
+                    model,
+                    "may_" + trigger,
+                    self._checked_trigger(model, machine, trigger),
+                )
+            for transitions in event.transitions.values():
+                for transition in transitions:
+                    transition.conditions = [
+                        _RecordedCondition(condition, self, machine)
+                        for condition in transition.conditions
+                    ]
+        if hasattr(model, "request_fault"):
+            model.request_fault = self._requested_fault(model, machine)
+        for state in model.machine.states.values():
+            set_callbacks(
+                state,
+                "enter",
+                [
+                    self._timed_callback(model, machine, callback)
+                    if isinstance(callback, str)
+                    else callback
+                    for callback in state.on_enter
+                ],
+            )
+
+    def attach(self, robot: PickAndPlaceRobot) -> None:
+        """Instrument a robot, its Arm and Gripper and its random source."""
+        self.instrument(robot, "robot")
+        self.instrument(robot.arm, "arm")
+        self.instrument(robot.gripper, "gripper")
+        robot.rng = _RecordedRandom(robot.rng, self)
+
+    @contextmanager
+    def cycle(self, robot: PickAndPlaceRobot) -> Iterator[PickAndPlaceRobot]:
+        """Record one pick and place cycle, attaching to the robot if needed.
+
+        Example:
+            >>> with recorder.cycle(robot):
+            ...     robot.execute_fsm()
+
+        Raises:
+            ValueError: If a cycle of another robot is being recorded.
+        """
+        with self._lock:
+            if self._cycle_robot is not None:
+                raise ValueError("Recorder is busy with another cycle", robot)
+            self._cycle_robot = robot
+        try:
+            if getattr(robot, "_trace_recorder", None) is not self:
+                self.attach(robot)
+            self.record(
+                "C",
+                list(robot.pick_target.as_row()),
+                list(robot.place_target.as_row()),
+            )
+            start = time.perf_counter()
+            try:
+                yield robot
+            finally:
+                self.record("E", robot.state, time.perf_counter() - start)
+                self.flush()
+        finally:
+            self._cycle_robot = None
+
+
+class _MemoryRecorder(TraceRecorder):
+    """Keeps the records of a replay and re-issues the recorded fault
+    requests at the position they had in the trace.
+
+    Args:
+        faults (list): ``(position, record)`` of every ``F`` record, the
+                       position counting records from the ``C`` record
+                       with repeated checks expanded.
+    """
+
+    def __init__(self, faults: list = ()) -> None:
+        super().__init__(None)
+        self.records = []
+        self.models = {}
+        self._faults = deque(faults)
+        self._position = 0
+
+    def record(self, *fields) -> None:
+        self._position += 1
+        super().record(*fields)
+        # A record is written once its call returned, so the request has to
+        # be issued before the call of the next record starts.
+        if self._faults and self._faults[0][0] == self._position:
+            _, (_, machine, reason) = self._faults.popleft()
+            self.models[machine].request_fault(reason)
+
+    def _write(self, record: list) -> None:
+        self.records.append(record)
+
+    def flush(self) -> None:
+        pass
+
+    def attach(self, robot: PickAndPlaceRobot) -> None:
+        super().attach(robot)
+        self.models = {"robot": robot, "arm": robot.arm, "gripper": robot.gripper}
+
+
+class ReplayResult(NamedTuple):
+    cycle: int
+    final_state: str
+    recorded_seconds: float
+    replayed_seconds: float
+    callback_seconds: dict
+
+
+def read_cycles(path: Union[str, Path]) -> Iterator[list]:
+    """Lazily yield the records of each complete cycle of a trace file.
+
+    Args:
+        path (Union[str, Path]): Trace file.
+
+    Yields:
+        list: Records from the ``C`` record to the ``E`` record inclusive.
+              Records outside a cycle and unfinished cycles are skipped.
+    """
+    records = None
+    with open(path) as trace:
+        for line in trace:
+            record = json.loads(line)
+            if record[0] == "C":
+                records = [record]
+            elif records is not None:
+                records.append(record)
+                if record[0] == "E":
+                    yield records
+                    records = None
+
+
+def _untimed(records: list) -> list:
+    return [
+        record[: _TIMED_FIELDS[record[0]]] if record[0] in _TIMED_FIELDS else record
+        for record in records
+    ]
+
+
+class TraceReplayer:
+    """Re-drives recorded cycles deterministically and without sleeping.
+
+    Every cycle gets a fresh robot whose random source returns the recorded
+    draws. The recorded robot level ``may_*`` checks and triggers are called
+    in order, the Arm and Gripper follow through the robot callbacks. Fault
+    requests are re-issued between the same records as when recording.
+
+    Args:
+        path (Union[str, Path]): Trace file written by ``TraceRecorder``.
+        robot_factory (Optional[Callable]): Called as
+            ``robot_factory(pick, place, rng=..., sleep=...)``. Use it to
+            rebuild robots configured like the recorded ones, e.g. with the
+            same workspace. Defaults to ``PickAndPlaceRobot``.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        robot_factory: Optional[Callable[..., PickAndPlaceRobot]] = None,
+    ) -> None:
+        self.path = path
+        self.robot_factory = robot_factory or PickAndPlaceRobot
+
+    def replay_cycle(self, index: int, records: list) -> ReplayResult:
+        """Replay the records of one cycle.
+
+        Raises:
+            TraceDivergenceError: If the replay does not reproduce the
+                                  recorded triggers, conditions and draws.
+        """
+        pick, place = (Target.from_row(row) for row in records[0][1:3])
+        draws = [record for record in records if record[0] == "R"]
+        robot = self.robot_factory(
+            pick, place, rng=_ReplayedRandom(draws), sleep=_no_sleep
+        )
+        expanded = _expand(records)
+        recorder = _MemoryRecorder(
+            [(i, record) for i, record in enumerate(expanded) if record[0] == "F"]
+        )
+        with recorder.cycle(robot):
+            for record in expanded:
+                if record[0] not in ("T", "M") or record[1] != "robot":
+                    continue
+                name = record[2] if record[0] == "T" else "may_" + record[2]
+                try:
+                    getattr(robot, name)()
+                except Exception as error:
+                    if not isinstance(record[4], str):
+                        raise TraceDivergenceError(
+                            f"Cycle {index} raised on {name}", record
+                        ) from error
+
+        # Flushes may have split the recorded runs of checks differently.
+        expected = _untimed(expanded)
+        replayed = _untimed(_expand(recorder.records))
+        if expected != replayed:
+            mismatch = next(
+                (
+                    i
+                    for i, pair in enumerate(zip(expected, replayed))
+                    if pair[0] != pair[1]
+                ),
+                min(len(expected), len(replayed)),
+            )
+            raise TraceDivergenceError(
+                f"Cycle {index} diverged at record {mismatch}",
+                expected[mismatch : mismatch + 1],
+                replayed[mismatch : mismatch + 1],
+            )
+
+        callback_seconds = {}
+        for record in recorder.records:
+            if record[0] == "B":
+                key = f"{record[1]}.{record[2]}"
+                callback_seconds[key] = callback_seconds.get(key, 0.0) + record[3]
+        return ReplayResult(
+            index,
+            robot.state,
+            records[-1][2],
+            recorder.records[-1][2],
+            callback_seconds,
+        )
+
+    def replay(self, quiet: bool = True) -> Iterator[ReplayResult]:
+        """Lazily replay every cycle of the trace.
+
+        Args:
+            quiet (bool): Discard what the machines print while replaying.
+
+        Yields:
+            ReplayResult: Timing of each replayed cycle.
+        """
+        for index, records in enumerate(read_cycles(self.path)):
+            if not quiet:
+                yield self.replay_cycle(index, records)
+                continue
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                result = self.replay_cycle(index, records)
+            yield result
+
+
+if __name__ == "__main__":
+    import sys
+
+    totals = {}
+    cycles, recorded, replayed = 0, 0.0, 0.0
+    for result in TraceReplayer(sys.argv[1]).replay():
+        cycles += 1
+        recorded += result.recorded_seconds
+        replayed += result.replayed_seconds
+        for name, seconds in result.callback_seconds.items():
+            totals[name] = totals.get(name, 0.0) + seconds
+    print(
+        f"Replayed {cycles} cycles: "
+        f"{recorded:.3f}s recorded, {replayed:.3f}s replayed"
+    )
+    for name, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+        print(f"{name:<40} {seconds * 1000:10.3f} ms")
@@ -43,5 +43,25 @@ class Target:
     ):
         return cls(Position(*position), Pose(*pose))
 
+    @classmethod
+    def from_row(cls, row):
+        """Build a target from a row of six numbers (x, y, z, roll, pitch, yaw).
+
+        Args:
+            row: Any sequence of six numbers, e.g. a NumPy array view.
+        """
+        return cls.from_floats(*(float(value) for value in row))
+
+    def as_row(self) -> tuple[float, float, float, float, float, float]:
+        """Inverse of ``from_row``."""
+        return (
+            self.position.x,
+            self.position.y,
+            self.position.z,
+            self.pose.roll,
+            self.pose.pitch,
+            self.pose.yaw,
+        )
+
     def __str__(self) -> str:
         return f"Target({self.position}, {self.pose})"
@@ -0,0 +1,255 @@
+"""Per-state timeouts and cycle deadlines for machines with a ``fault`` state.
+
+All watchdogs share one ``TimerWheel`` and therefore one timer thread,
+however many robots they watch. An expired timer only requests a fault; the
+thread driving the machine takes the ``fault`` transition on its next pass
+through ``execute_fsm`` and is released from the loop.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from model.callbacks import add_callback
+from model.fault import FaultReport
+
+
+class Timer(object):
+    """Handle of a callback scheduled on a ``TimerWheel``."""
+
+    __slots__ = ("tick", "callback", "cancelled")
+
+    def __init__(self, tick: int, callback: Callable[[], None]) -> None:
+        self.tick = tick
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel(object):
+    """Hashed timing wheel driven by a single daemon thread.
+
+    Scheduling and cancelling are O(1). A timer fires on the first tick at
+    or after its deadline, so it may be late by up to one ``tick``.
+
+    Args:
+        tick (float): Resolution of the wheel in seconds.
+        slots (int): Number of buckets of the wheel.
+        clock (Callable[[], float]): Monotonic clock.
+        start_thread (bool): Run ``advance`` from a daemon thread once the
+                             first timer is scheduled. Without it the owner
+                             has to call ``advance`` itself.
+    """
+
+    def __init__(
+        self,
+        tick: float = 0.05,
+        slots: int = 512,
+        clock: Callable[[], float] = time.monotonic,
+        start_thread: bool = True,
+    ) -> None:
+        self.tick = tick
+        self.clock = clock
+        self._buckets = [[] for _ in range(slots)]
+        self._origin = clock()
+        self._current_tick = 0
+        self._lock = threading.Lock()
+        self._start_thread = start_thread
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def _tick_at(self, moment: float) -> int:
+        return int((moment - self._origin) // self.tick)
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> Timer:
+        """Call ``callback`` from the wheel thread after ``delay`` seconds.
+
+        Returns:
+            Timer: Handle to cancel the callback.
+        """
+        with self._lock:
+            tick = max(self._tick_at(self.clock() + delay), self._current_tick + 1)
+            timer = Timer(tick, callback)
+            self._buckets[tick % len(self._buckets)].append(timer)
+            if self._start_thread and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="TimerWheel", daemon=True
+                )
+                self._thread.start()
+        return timer
+
+    def advance(self) -> int:
+        """Fire every timer that expired since the last call.
+
+        Returns:
+            int: Number of fired callbacks.
+        """
+        expired = []
+        with self._lock:
+            now_tick = self._tick_at(self.clock())
+            # A full turn visits every bucket, later ticks would repeat them.
+            last_tick = min(now_tick, self._current_tick + len(self._buckets))
+            for tick in range(self._current_tick + 1, last_tick + 1):
+                bucket = self._buckets[tick % len(self._buckets)]
+                pending = []
+                for timer in bucket:
+                    if timer.cancelled:
+                        continue
+                    if timer.tick <= now_tick:
+                        expired.append(timer)
+                    else:
+                        pending.append(timer)
+                bucket[:] = pending
+            self._current_tick = max(self._current_tick, now_tick)
+        for timer in expired:
+            timer.callback()
+        return len(expired)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.tick):
+            self.advance()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+_default_wheel = None
+_default_wheel_lock = threading.Lock()
+
+
+def default_wheel() -> TimerWheel:
+    """Timer wheel shared by every ``Watchdog`` created without one."""
+    global _default_wheel
+    with _default_wheel_lock:
+        if _default_wheel is None:
+            _default_wheel = TimerWheel()
+        return _default_wheel
+
+
+class Watchdog(object):
+    """Faults a machine that stays too long in a state or in a cycle.
+
+    Works with ``PickAndPlaceRobot`` and ``Arm``. A cycle starts when the
+    machine leaves ``idle`` and ends in one of ``end_states``. Faulting a
+    ``PickAndPlaceRobot`` also faults an Arm loop it is blocked in.
+
+    Args:
+        state_timeouts (Optional[dict]): Seconds allowed in each state.
+                                         States missing from it are not timed.
+        cycle_deadline (Optional[float]): Seconds allowed for a whole cycle.
+        on_fault (Optional[Callable]): Called as ``on_fault(model, report)``
+                                       by the thread driving the machine once
+                                       it entered ``fault``.
+        wheel (Optional[TimerWheel]): Timer wheel, the shared one by default.
+    """
+
+    end_states = ("finished", "finish", "fault")
+
+    def __init__(
+        self,
+        state_timeouts: Optional[dict] = None,
+        cycle_deadline: Optional[float] = None,
+        on_fault: Optional[Callable[[object, FaultReport], None]] = None,
+        wheel: Optional[TimerWheel] = None,
+    ) -> None:
+        self.state_timeouts = state_timeouts or {}
+        self.cycle_deadline = cycle_deadline
+        self.on_fault = on_fault or self.print_fault
+        self.wheel = wheel or default_wheel()
+
+    @staticmethod
+    def print_fault(model, report: FaultReport) -> None:
+        print(
+            f"Machine {report.machine} faulted in state {report.state}: "
+            f"{report.reason}\nBlocked transitions: {report.blocked}"
+        )
+
+    def _expire(
+        self, model, counter: str, value: int, reason: str
+    ) -> Callable[[], None]:
+        def request_fault() -> None:
+            with model._watchdog_lock:
+                # Ignore timers of a state or cycle the machine has left
+                # meanwhile, they may fire while it is leaving.
+                if getattr(model, counter) != value:
+                    return
+                if model.state in self.end_states:
+                    return
+                model.request_fault(reason)
+
+        return request_fault
+
+    def _on_enter(self, model, state: str) -> Callable:
+        def restart_timers(*_, **__) -> None:
+            with model._watchdog_lock:
+                model._watchdog_entry += 1
+                if model._watchdog_state_timer is not None:
+                    model._watchdog_state_timer.cancel()
+                    model._watchdog_state_timer = None
+                if state in self.end_states:
+                    model._watchdog_cycle += 1
+                    if model._watchdog_cycle_timer is not None:
+                        model._watchdog_cycle_timer.cancel()
+                        model._watchdog_cycle_timer = None
+                    # A timer may have requested a fault the machine did not
+                    # take before the cycle ended.
+                    model.cancel_fault_request()
+                    return
+                timeout = self.state_timeouts.get(state)
+                if timeout is not None:
+                    reason = f"State {state!r} exceeded its {timeout}s timeout"
+                    model._watchdog_state_timer = self.wheel.schedule(
+                        timeout,
+                        self._expire(
+                            model, "_watchdog_entry", model._watchdog_entry, reason
+                        ),
+                    )
+
+        return restart_timers
+
+    def _on_cycle_start(self, model) -> Callable:
+        def start_cycle(*_, **__) -> None:
+            if self.cycle_deadline is None:
+                return
+            with model._watchdog_lock:
+                model._watchdog_cycle += 1
+                if model._watchdog_cycle_timer is not None:
+                    model._watchdog_cycle_timer.cancel()
+                reason = f"Cycle exceeded its {self.cycle_deadline}s deadline"
+                model._watchdog_cycle_timer = self.wheel.schedule(
+                    self.cycle_deadline,
+                    self._expire(
+                        model, "_watchdog_cycle", model._watchdog_cycle, reason
+                    ),
+                )
+
+        return start_cycle
+
+    def _on_fault(self, model) -> Callable:
+        def report_fault(*_, **__) -> None:
+            self.on_fault(model, model.fault_report)
+
+        return report_fault
+
+    def watch(self, model) -> None:
+        """Start enforcing the timeouts on a machine.
+
+        Args:
+            model: ``PickAndPlaceRobot`` or ``Arm``.
+        """
+        model._watchdog_lock = threading.Lock()
+        model._watchdog_entry = 0
+        model._watchdog_cycle = 0
+        model._watchdog_state_timer = None
+        model._watchdog_cycle_timer = None
+        for name, state in model.machine.states.items():
+            add_callback(state, "enter", self._on_enter(model, name), first=True)
+        idle = model.machine.get_state("idle")
+        add_callback(idle, "exit", self._on_cycle_start(model))
+        fault = model.machine.get_state("fault")
+        add_callback(fault, "enter", self._on_fault(model))
+        self._on_enter(model, model.state)()
+        if model.state != "idle":
+            self._on_cycle_start(model)()
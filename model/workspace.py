@@ -0,0 +1,205 @@
+"""Workspace model used to screen Arm targets against keep-out zones.
+
+Keep-out zones are axis-aligned boxes indexed by a uniform grid, so a query
+only tests the few boxes that overlap the cell of the queried point. Zones
+spanning more than ``MAX_INDEXED_CELLS`` cells within the bounds, including
+unbounded ones, are kept out of the grid and tested by every query instead.
+"""
+
+import math
+from typing import Iterable, Optional
+
+import numpy as np
+
+from model.utils import Position
+
+MAX_INDEXED_CELLS = 4096
+
+
+class Box:
+    """Closed axis-aligned box given by its lower and upper corners."""
+
+    def __init__(
+        self,
+        lower: tuple[float, float, float],
+        upper: tuple[float, float, float],
+    ) -> None:
+        self.lower = tuple(float(value) for value in lower)
+        self.upper = tuple(float(value) for value in upper)
+        if len(self.lower) != 3 or len(self.upper) != 3:
+            raise ValueError("Box corners must have three coordinates")
+        if any(low > high for low, high in zip(self.lower, self.upper)):
+            raise ValueError("Box lower corner must not exceed the upper corner")
+
+    @classmethod
+    def from_positions(cls, corner_a: Position, corner_b: Position):
+        a = (corner_a.x, corner_a.y, corner_a.z)
+        b = (corner_b.x, corner_b.y, corner_b.z)
+        return cls(tuple(map(min, a, b)), tuple(map(max, a, b)))
+
+    def contains(self, position: Position) -> bool:
+        """
+        Returns:
+            bool: True if the position lies inside or on the box.
+        """
+        point = (position.x, position.y, position.z)
+        return all(
+            low <= value <= high
+            for low, value, high in zip(self.lower, point, self.upper)
+        )
+
+    def __str__(self) -> str:
+        return f"Box({self.lower}, {self.upper})"
+
+
+class Workspace:
+    """Reachable volume of the Arm minus its keep-out zones.
+
+    Args:
+        bounds (Optional[Box]): Volume the Arm may move in. Unbounded if None.
+        keep_out_zones (Iterable[Box]): Boxes the Arm must never enter.
+        cell_size (float): Edge length of the grid cells indexing the zones.
+                           Pick it close to the size of a typical zone.
+    """
+
+    def __init__(
+        self,
+        bounds: Optional[Box] = None,
+        keep_out_zones: Iterable[Box] = (),
+        cell_size: float = 1.0,
+    ) -> None:
+        if cell_size <= 0:
+            raise ValueError("Grid cell size must be positive", cell_size)
+        self.bounds = bounds
+        self.cell_size = float(cell_size)
+        self.keep_out_zones = []
+        self._grid = {}
+        self._large_zones = []
+        self._lower = np.empty((0, 3))
+        self._upper = np.empty((0, 3))
+        for box in keep_out_zones:
+            self.add_keep_out_zone(box)
+
+    def _cell(self, point) -> tuple[int, int, int]:
+        return tuple(math.floor(value / self.cell_size) for value in point)
+
+    def add_keep_out_zone(self, box: Box) -> None:
+        """Register a box and index it in every grid cell it overlaps.
+
+        Only the part of the box inside the bounds is indexed. Boxes that
+        would fill more than ``MAX_INDEXED_CELLS`` cells are not indexed but
+        tested by every query.
+        """
+        index = len(self.keep_out_zones)
+        self.keep_out_zones.append(box)
+        self._lower = np.vstack([self._lower, box.lower])
+        self._upper = np.vstack([self._upper, box.upper])
+        lower, upper = np.array(box.lower), np.array(box.upper)
+        if self.bounds is not None:
+            lower = np.maximum(lower, self.bounds.lower)
+            upper = np.minimum(upper, self.bounds.upper)
+            if (lower > upper).any():
+                return
+        spans = np.floor(upper / self.cell_size) - np.floor(lower / self.cell_size)
+        if not np.isfinite(spans).all() or np.prod(spans + 1) > MAX_INDEXED_CELLS:
+            self._large_zones.append(index)
+            return
+        first, last = self._cell(lower), self._cell(upper)
+        for i in range(first[0], last[0] + 1):
+            for j in range(first[1], last[1] + 1):
+                for k in range(first[2], last[2] + 1):
+                    self._grid.setdefault((i, j, k), []).append(index)
+
+    def is_position_allowed(self, position: Position) -> bool:
+        """Check a single position against the bounds and keep-out zones.
+
+        Args:
+            position (Position): Position to be checked.
+
+        Returns:
+            bool: True if the Arm may move to the position.
+        """
+        point = (position.x, position.y, position.z)
+        if not all(math.isfinite(value) for value in point):
+            return False
+        if self.bounds is not None and not self.bounds.contains(position):
+            return False
+        candidates = self._grid.get(self._cell(point), [])
+        return not any(
+            self.keep_out_zones[i].contains(position)
+            for i in candidates + self._large_zones
+        )
+
+    def allowed_mask(self, points: np.ndarray) -> np.ndarray:
+        """Vectorized ``is_position_allowed`` for many points at once.
+
+        Points are grouped by grid cell and each group is tested only against
+        the zones indexed in its cell, plus the zones too large to index.
+
+        Args:
+            points (np.ndarray): Array of shape (N, 3) with x, y, z columns,
+                                 e.g. ``targets[:, :3]`` of a bulk target array.
+
+        Returns:
+            np.ndarray: Boolean mask of shape (N,).
+        """
+        points = np.asarray(points, dtype=float)
+        if points.ndim != 2 or points.shape[1] != 3:
+            raise ValueError("Points must have shape (N, 3)", points.shape)
+
+        allowed = np.isfinite(points).all(axis=1)
+        if self.bounds is not None:
+            allowed &= (points >= self.bounds.lower).all(axis=1)
+            allowed &= (points <= self.bounds.upper).all(axis=1)
+        if self._large_zones:
+            group = points[:, None, :]
+            lower = self._lower[self._large_zones]
+            upper = self._upper[self._large_zones]
+            inside = (group >= lower) & (group <= upper)
+            allowed &= ~inside.all(axis=2).any(axis=1)
+        candidates = np.flatnonzero(allowed)
+        if not self._grid or not candidates.size:
+            return allowed
+
+        cells = np.floor(points[candidates] / self.cell_size).astype(np.int64)
+        keys, inverse, counts = np.unique(
+            cells, axis=0, return_inverse=True, return_counts=True
+        )
+        order = np.argsort(inverse.reshape(-1), kind="stable")
+        ends = np.cumsum(counts)
+        for key, start, end in zip(keys, ends - counts, ends):
+            zones = self._grid.get(tuple(key.tolist()))
+            if not zones:
+                continue
+            rows = candidates[order[start:end]]
+            group = points[rows, None, :]
+            inside = (group >= self._lower[zones]) & (group <= self._upper[zones])
+            allowed[rows[inside.all(axis=2).any(axis=1)]] = False
+        return allowed
+
+    def is_trajectory_allowed(self, samples: np.ndarray) -> bool:
+        """
+        Args:
+            samples (np.ndarray): Trajectory samples of shape (N, 3).
+
+        Returns:
+            bool: True if every sample is allowed.
+        """
+        return bool(self.allowed_mask(samples).all())
+
+    @staticmethod
+    def sample_segment(start: Position, end: Position, samples: int) -> np.ndarray:
+        """Evenly sample the straight line between two positions.
+
+        Args:
+            start (Position): First sample.
+            end (Position): Last sample.
+            samples (int): Number of samples, at least 2.
+
+        Returns:
+            np.ndarray: Array of shape (samples, 3).
+        """
+        a = np.array([start.x, start.y, start.z], dtype=float)
+        b = np.array([end.x, end.y, end.z], dtype=float)
+        weights = np.linspace(0.0, 1.0, samples)[:, None]
+        return a + weights * (b - a)
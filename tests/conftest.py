@@ -1,9 +1,14 @@
+import random
+
 import pytest
 
 
 from model.arm import Arm
 from model.gripper import Gripper
+from model.gripper_bank import GripperBank
+from model.pick_and_place import PickAndPlaceRobot
 from model.utils import Position, Pose, Target
+from model.workspace import Box, Workspace
 
 
 @pytest.fixture(scope="function")
@@ -39,3 +44,50 @@ def targets():
     target0 = Target(Position(1.0, 2.0, 3.0), Pose(0.0, 0.0, 0.0))
     target1 = Target(Position(4.0, 5.0, 6.0), Pose(1.0, 2.0, 3.0))
     yield (target0, target1)
+
+
+@pytest.fixture(scope="function")
+def no_sleep():
+    def sleep(_):
+        pass
+
+    yield sleep
+
+
+@pytest.fixture(scope="function")
+def robot_factory(targets, no_sleep):
+    """Builds robots on ``targets`` that do not sleep, seeded by ``seed``."""
+
+    def make_robot(seed=None, **kwargs):
+        kwargs.setdefault("sleep", no_sleep)
+        rng = None if seed is None else random.Random(seed)
+        return PickAndPlaceRobot(*targets, rng=rng, **kwargs)
+
+    yield make_robot
+
+
+@pytest.fixture(scope="function")
+def workspace():
+    yield Workspace(
+        bounds=Box((-10.0, -10.0, 0.0), (10.0, 10.0, 10.0)),
+        keep_out_zones=[Box((0.0, 0.0, 0.0), (2.0, 2.0, 2.0))],
+    )
+
+
+@pytest.fixture(scope="function")
+def sleeps():
+    """Durations passed to the ``sleep`` of the machines built with it."""
+    yield []
+
+
+@pytest.fixture(scope="function")
+def gripper_bank(sleeps):
+    yield GripperBank(4, sleep=sleeps.append)
+
+
+@pytest.fixture(scope="function")
+def arm_positioned(target, sleeps):
+    arm = Arm(sleep=sleeps.append)
+    arm.set_target(*target)
+    arm.position_arm()
+    yield arm
@@ -1,4 +1,10 @@
+import threading
+
 import pytest
+from transitions.core import MachineError
+
+from model.arm import Arm
+from model.callbacks import add_callback
 from model.utils import Position, Pose
 
 
@@ -57,3 +63,96 @@ def test_arm_can_reach_two_sequential_targets(arm, targets):
     arm.execute(target1.position, target1.pose)
     state = arm.state
     assert state == "finish", "Arm did not finish"
+
+
+def test_arm_dont_position_into_keep_out_zone(workspace):
+    arm = Arm(workspace)
+    arm.set_target(Position(1.0, 1.0, 1.0), Pose(0.0, 0.0, 0.0))
+    with pytest.raises(ValueError):
+        arm.position_arm()
+    assert arm.state == "idle", "Arm moved into a keep-out zone"
+
+
+def test_arm_positions_inside_workspace(workspace):
+    arm = Arm(workspace)
+    arm.set_target(Position(5.0, 5.0, 5.0), Pose(0.0, 0.0, 0.0))
+    assert arm.position_arm(), "Arm did not position"
+
+
+def test_arm_can_retarget_while_going_to_position(arm_positioned, sleeps):
+    new_position = Position(4.0, 5.0, 6.0)
+    assert arm_positioned.retarget(new_position, Pose(0.0, 0.0, 0.0))
+    assert arm_positioned.state == "go_to_position", "Arm left go_to_position"
+    assert arm_positioned.current_position is new_position, "Arm did not move"
+    assert sleeps == [1, 1]
+
+
+def test_arm_only_reposes_when_position_is_unchanged(arm_positioned, sleeps):
+    arm_positioned.pose_arm()
+    same_position = Position(1.0, 2.0, 3.0)
+    new_pose = Pose(1.0, 0.0, 0.0)
+    assert arm_positioned.retarget(same_position, new_pose)
+    assert arm_positioned.state == "pose", "Arm did not stay in pose"
+    assert arm_positioned.is_positioned and arm_positioned.is_posed
+    assert arm_positioned.current_pose is new_pose
+    assert sleeps == [1, 1, 1], "Arm moved again"
+
+
+def test_arm_goes_back_to_position_on_new_position_while_posing(arm_positioned):
+    arm_positioned.pose_arm()
+    arm_positioned.retarget(Position(4.0, 5.0, 6.0), Pose(0.0, 0.0, 0.0))
+    assert arm_positioned.state == "go_to_position"
+    arm_positioned.execute_fsm()
+    assert arm_positioned.state == "finish", "Arm did not finish"
+
+
+def test_retarget_from_another_thread_waits_for_the_driving_thread(arm_positioned):
+    new_position = Position(4.0, 5.0, 6.0)
+    tracker = threading.Thread(
+        target=arm_positioned.retarget, args=(new_position, Pose(0.0, 0.0, 0.0))
+    )
+    # Held by the driving thread while it checks and fires a trigger.
+    with arm_positioned._lock:
+        tracker.start()
+        tracker.join(0.05)
+        assert tracker.is_alive(), "retarget did not wait for the lock"
+        assert arm_positioned.current_position is not new_position
+    tracker.join(1.0)
+    assert arm_positioned.current_position is new_position, "Arm was not retargeted"
+
+
+def test_arm_keeps_target_on_invalid_retarget(arm_positioned):
+    target_position = arm_positioned.target_position
+    with pytest.raises(ValueError):
+        arm_positioned.retarget(None, None)
+    assert arm_positioned.target_position is target_position
+    assert arm_positioned.state == "go_to_position"
+    assert not arm_positioned.has_pending_target
+
+
+def test_arm_cannot_retarget_when_idle(arm, target):
+    with pytest.raises(MachineError):
+        arm.retarget(*target)
+
+
+def test_robot_picks_at_the_retargeted_position(robot_factory):
+    # Seed 1 picks and places at the first attempt.
+    robot = robot_factory(1)
+    new_position = Position(7.0, 8.0, 9.0)
+    picked_at = []
+
+    def retarget_once():
+        if robot.state == "pick" and not picked_at:
+            picked_at.append(new_position)
+            assert robot.arm.retarget(new_position, robot.pick_target.pose)
+
+    add_callback(robot.arm.machine.get_state("pose"), "enter", retarget_once)
+    add_callback(
+        robot.machine.get_state("place"),
+        "enter",
+        lambda: picked_at.append(robot.arm.current_position),
+        first=True,
+    )
+    robot.execute_fsm()
+    assert robot.state == "finished", "Robot did not pick at the new target"
+    assert picked_at == [new_position, new_position]
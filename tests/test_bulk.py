@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from model.bulk import (
+    iter_target_chunks,
+    iter_target_pairs,
+    iter_targets,
+    open_target_array,
+    valid_target_mask,
+)
+from model.workspace import Box, Workspace
+
+
+@pytest.fixture(scope="function")
+def target_rows():
+    yield np.arange(5 * 12, dtype=np.float64).reshape(5, 12)
+
+
+def test_npy_files_are_memory_mapped(tmp_path, target_rows):
+    path = tmp_path / "targets.npy"
+    np.save(path, target_rows)
+    array = open_target_array(path)
+    assert isinstance(array, np.memmap), "npy file was not memory-mapped"
+    np.testing.assert_array_equal(array, target_rows)
+
+
+def test_uncompressed_npz_members_are_memory_mapped(tmp_path, target_rows):
+    path = tmp_path / "targets.npz"
+    np.savez(path, other=np.zeros((1, 6)), targets=target_rows)
+    array = open_target_array(path, key="targets")
+    assert isinstance(array, np.memmap), "npz member was not memory-mapped"
+    np.testing.assert_array_equal(array, target_rows)
+
+    compressed_path = tmp_path / "compressed.npz"
+    np.savez_compressed(compressed_path, targets=target_rows)
+    array = open_target_array(compressed_path)
+    assert not isinstance(array, np.memmap), "compressed member was mapped"
+    np.testing.assert_array_equal(array, target_rows)
+
+
+def test_missing_npz_member_raises_value_error(tmp_path, target_rows):
+    path = tmp_path / "targets.npz"
+    np.savez(path, targets=target_rows)
+    with pytest.raises(ValueError) as error:
+        open_target_array(path, key="missing")
+    assert error.value.args[1:] == ("missing", path)
+
+
+def test_bin_files_need_column_count(tmp_path, target_rows):
+    path = tmp_path / "targets.bin"
+    target_rows.astype("<f8").tofile(path)
+    with pytest.raises(ValueError):
+        open_target_array(path)
+    np.testing.assert_array_equal(open_target_array(path, columns=12), target_rows)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".npy", ".npz", ".bin"])
+def test_all_formats_yield_the_same_pairs(tmp_path, target_rows, suffix):
+    path = tmp_path / f"targets{suffix}"
+    if suffix == ".csv":
+        np.savetxt(path, target_rows, delimiter=",", header="pick,place")
+    elif suffix == ".npy":
+        np.save(path, target_rows)
+    elif suffix == ".npz":
+        np.savez(path, targets=target_rows)
+    else:
+        target_rows.astype("<f8").tofile(path)
+
+    pairs = list(iter_target_pairs(path, chunk_size=2))
+    assert len(pairs) == len(target_rows)
+    pick, place = pairs[-1]
+    assert pick.position.x == target_rows[-1, 0]
+    assert place.pose.yaw == target_rows[-1, -1]
+
+
+def test_chunks_are_views_of_the_mapped_file(tmp_path, target_rows):
+    path = tmp_path / "targets.npy"
+    np.save(path, target_rows)
+    chunks = list(iter_target_chunks(path, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert all(np.shares_memory(chunk, chunks[0].base) for chunk in chunks)
+
+
+def test_valid_target_mask_rejects_non_finite_rows():
+    array = np.zeros((3, 6))
+    array[1, 2] = np.nan
+    array[2, 4] = np.inf
+    assert valid_target_mask(array).tolist() == [True, False, False]
+
+
+def test_valid_target_mask_checks_pick_and_place_against_workspace():
+    workspace = Workspace(keep_out_zones=[Box((5, 5, 5), (6, 6, 6))])
+    array = np.zeros((3, 12))
+    array[1, :3] = 5.5
+    array[2, 6:9] = 5.5
+    assert valid_target_mask(array).tolist() == [True, True, True]
+    assert valid_target_mask(array, workspace).tolist() == [True, False, False]
+
+
+def test_invalid_rows_raise_with_their_index(tmp_path):
+    array = np.zeros((4, 6))
+    array[3, 0] = np.nan
+    path = tmp_path / "targets.npy"
+    np.save(path, array)
+    with pytest.raises(ValueError) as error:
+        list(iter_targets(path, chunk_size=2))
+    assert error.value.args[1] == [3]
+
+    array[3, 0] = 0.0
+    array[1, 0] = 10.0
+    np.save(path, array)
+    workspace = Workspace(bounds=Box((-1, -1, -1), (1, 1, 1)))
+    with pytest.raises(ValueError) as error:
+        list(iter_targets(path, chunk_size=2, workspace=workspace))
+    assert error.value.args[1] == [1]
+
+
+def test_single_target_files_cannot_be_read_as_pairs(tmp_path):
+    path = tmp_path / "targets.npy"
+    np.save(path, np.zeros((2, 6)))
+    assert len(list(iter_targets(path))) == 2
+    with pytest.raises(ValueError):
+        list(iter_target_pairs(path))
@@ -0,0 +1,45 @@
+import pytest
+
+
+from transitions.core import MachineError
+
+
+def test_gripper_bank_is_in_idle_state_when_created(gripper_bank):
+    assert gripper_bank.state.tolist() == ["idle"] * 4, "Grippers are not idle"
+
+
+def test_gripper_bank_actuates_selected_grippers_with_one_wait(gripper_bank, sleeps):
+    gripper_bank.reset()
+    fired = gripper_bank.close([1, 3])
+    assert fired.tolist() == [False, True, False, True]
+    assert gripper_bank.state.tolist() == ["opening", "closing"] * 2
+    assert gripper_bank.closed().tolist() == [False, True, False, True]
+    assert sleeps == [1, 1], "Grippers were not actuated together"
+
+
+def test_gripper_bank_cannot_open_from_opening(gripper_bank):
+    gripper_bank.reset()
+    with pytest.raises(MachineError):
+        gripper_bank.open([0])
+
+
+def test_gripper_bank_can_open_closed_grippers(gripper_bank):
+    gripper_bank.reset()
+    gripper_bank.close()
+    gripper_bank.open(gripper_bank.closed())
+    assert gripper_bank.opened().all(), "Grippers did not open"
+    assert gripper_bank.state.tolist() == ["opening"] * 4
+
+
+def test_gripper_bank_may_queries_match_gripper_conditions(gripper_bank):
+    gripper_bank.reset([0, 1])
+    assert gripper_bank.may_close().tolist() == [True, True, False, False]
+    assert gripper_bank.may_open().tolist() == [False] * 4
+    assert gripper_bank.may_reset().all()
+
+
+def test_gripper_bank_ignores_empty_selections(gripper_bank, sleeps):
+    gripper_bank.reset()
+    assert not gripper_bank.close([]).any()
+    assert gripper_bank.state.tolist() == ["opening"] * 4
+    assert sleeps == [1], "Empty selection actuated the grippers"
@@ -0,0 +1,94 @@
+import gc
+import threading
+import urllib.request
+
+import pytest
+
+from model.metrics import (
+    MetricsRegistry,
+    load_snapshots,
+    merge_snapshots,
+    occupancy,
+    render_prometheus,
+    serve_http,
+)
+
+
+@pytest.fixture(scope="function")
+def registry():
+    yield MetricsRegistry()
+
+
+def _run_robot(registry, robot_factory, seed, robots=None):
+    robot = robot_factory(seed)
+    registry.attach(robot)
+    robot.execute_fsm()
+    # Collected robots leave their state, keep them to check the occupancy.
+    if robots is not None:
+        robots.append(robot)
+    return robot
+
+
+def test_registry_counts_a_completed_cycle(registry, robot_factory):
+    robot = _run_robot(registry, robot_factory, seed=1)
+    snapshot = registry.snapshot()
+    assert robot.state == "finished"
+    assert occupancy(snapshot) == {"idle": 0, "pick": 0, "place": 0, "finished": 1}
+    assert snapshot["entries"]["finished"] == 1
+    assert sum(snapshot["latency_buckets"]) == 1
+    assert snapshot["throughput"] > 0
+
+
+def test_registry_aggregates_threads(registry, robot_factory):
+    robots = []
+    threads = [
+        threading.Thread(
+            target=_run_robot, args=(registry, robot_factory, seed, robots)
+        )
+        for seed in (1, 2, 3, 14)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = registry.snapshot()
+    assert snapshot["entries"]["finished"] == 4
+    assert occupancy(snapshot)["finished"] == 4
+    assert registry._shards == [], "Shards of ended threads were kept"
+
+
+def test_detached_and_collected_robots_leave_their_state(registry, robot_factory):
+    robot = _run_robot(registry, robot_factory, seed=1)
+    registry.detach(robot)
+    robot.to_idle()
+    assert occupancy(registry.snapshot())["finished"] == 0
+    assert registry.snapshot()["entries"]["idle"] == 1, "Detached robot counted"
+
+    robot = robot_factory()
+    registry.attach(robot)
+    assert occupancy(registry.snapshot())["idle"] == 1
+    del robot
+    gc.collect()
+    assert occupancy(registry.snapshot())["idle"] == 0
+
+
+def test_snapshots_of_several_processes_are_merged(tmp_path, robot_factory):
+    for index, seed in enumerate((1, 2)):
+        registry = MetricsRegistry()
+        _run_robot(registry, robot_factory, seed)
+        registry.dump(tmp_path / f"worker-{index}.json")
+    merged = merge_snapshots(load_snapshots(tmp_path))
+    assert merged["entries"]["finished"] == 2
+    assert "pick_and_place_completed_total 2" in render_prometheus(merged)
+
+
+def test_http_exporter_serves_prometheus_text(registry, robot_factory):
+    robot = _run_robot(registry, robot_factory, seed=1)
+    assert robot.state == "finished"
+    server = serve_http(registry.snapshot, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        body = urllib.request.urlopen(url).read().decode()
+    finally:
+        server.shutdown()
+    assert 'pick_and_place_state_occupancy{state="finished"} 1' in body
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+import pytest
+
+import model
+
+
+def _loaded_modules_after(statement):
+    code = f"{statement}\nimport sys\nprint(' '.join(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return set(output.stdout.split())
+
+
+def test_import_model_does_not_load_transitions():
+    loaded = _loaded_modules_after("import model")
+    assert "transitions" not in loaded, "transitions imported eagerly"
+    assert "model.pick_and_place" not in loaded, "sub-machines imported eagerly"
+
+
+def test_target_access_only_loads_utils():
+    loaded = _loaded_modules_after("from model import Target")
+    assert "model.utils" in loaded
+    assert "transitions" not in loaded, "transitions imported for Target"
+
+
+@pytest.mark.parametrize("name", model.__all__)
+def test_public_names_resolve_lazily(name):
+    assert getattr(model, name).__name__ == name
+
+
+def test_unknown_attribute_raises_attribute_error():
+    with pytest.raises(AttributeError):
+        model.does_not_exist
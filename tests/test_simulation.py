@@ -0,0 +1,70 @@
+import itertools
+
+import pytest
+
+from model.simulation import Simulation, random_jobs
+from model.utils import Target
+
+
+@pytest.fixture(scope="function")
+def simulation():
+    yield Simulation(random_jobs(seed=0), robots=3, seed=0)
+
+
+def test_simulation_reports_throughput_and_utilization(simulation):
+    report = simulation.run(3600)
+    assert report.completed == sum(cell.completed for cell in report.cells)
+    assert report.throughput_per_hour == report.completed
+    assert report.completed > 0, "No cycle completed"
+    assert 0 < report.utilization <= 1
+
+
+def test_simulation_is_deterministic_for_a_seed():
+    reports = [
+        Simulation(random_jobs(seed=1), robots=2, seed=1).run(1800) for _ in range(2)
+    ]
+    assert reports[0] == reports[1]
+
+
+def test_motion_time_grows_with_travel_distance(targets):
+    durations = []
+    for speed in (1.0, 0.5):
+        simulation = Simulation(
+            itertools.repeat(targets, 1), robots=1, seed=1, speed=speed
+        )
+        simulation.run(3600)
+        durations.append(simulation.cells[0].state_seconds["pick"])
+    assert durations[1] > durations[0], "Arm motion does not depend on speed"
+
+
+def test_robots_stop_when_jobs_run_out(targets):
+    simulation = Simulation([targets] * 4, robots=2, seed=2)
+    report = simulation.run(8 * 3600)
+    assert report.completed + report.failed == 4
+
+
+def test_place_time_grows_with_place_distance():
+    pick = Target.from_floats(1.0, 2.0, 3.0, 0.0, 0.0, 0.0)
+    durations = []
+    for distance in (1.0, 5.0):
+        place = Target.from_floats(1.0 + distance, 2.0, 3.0, 0.0, 0.0, 0.0)
+        # Seed 1 picks and places successfully.
+        simulation = Simulation([(pick, place)], robots=1, seed=1)
+        assert simulation.run(3600).completed == 1
+        durations.append(simulation.cells[0].state_seconds["place"])
+    assert durations[1] - durations[0] == pytest.approx(4.0), "Place move not timed"
+
+
+def test_zero_horizon_reports_no_throughput(simulation):
+    report = simulation.run(0)
+    assert report.completed == 0
+    assert report.throughput_per_hour == 0.0
+    assert report.utilization == 0.0
+
+
+@pytest.mark.parametrize("max_tries", [1, 2])
+def test_jobs_are_given_up_after_max_tries_failed_picks(targets, max_tries):
+    # Seed 2 fails its first pick and every retry.
+    simulation = Simulation([targets], robots=1, seed=2, max_tries=max_tries)
+    assert simulation.run(3600).failed == 1
+    assert simulation.cells[0].robot.tries == max_tries
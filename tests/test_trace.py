@@ -0,0 +1,116 @@
+import io
+import json
+
+import pytest
+
+from model.trace import TraceDivergenceError, TraceRecorder, TraceReplayer
+from model.watchdog import TimerWheel, Watchdog
+
+
+@pytest.fixture(scope="function")
+def trace_path(tmp_path, robot_factory):
+    path = tmp_path / "trace.jsonl"
+    recorder = TraceRecorder(path)
+    for seed in (1, 2):
+        robot = robot_factory(seed)
+        with recorder.cycle(robot):
+            robot.execute_fsm()
+    recorder.close()
+    yield path
+
+
+@pytest.fixture(scope="function")
+def faulted_trace_path(tmp_path, robot_factory):
+    # Seed 4 picks successfully and fails to place, leaving no allowed trigger.
+    path = tmp_path / "trace.jsonl"
+    wheel = TimerWheel(tick=0.01)
+    robot = robot_factory(4)
+    Watchdog(cycle_deadline=0.05, wheel=wheel, on_fault=lambda *_: None).watch(robot)
+    recorder = TraceRecorder(path)
+    with recorder.cycle(robot):
+        robot.execute_fsm()
+    recorder.close()
+    wheel.stop()
+    yield path
+
+
+def test_trace_records_triggers_conditions_and_draws(trace_path):
+    kinds = {json.loads(line)[0] for line in trace_path.read_text().splitlines()}
+    assert kinds == {"C", "T", "M", "K", "R", "B", "E"}
+
+
+def test_replay_reproduces_recorded_cycles(trace_path):
+    results = list(TraceReplayer(trace_path).replay())
+    assert [result.cycle for result in results] == [0, 1]
+    assert all(result.final_state == "finished" for result in results)
+    assert "arm.going_to_position" in results[0].callback_seconds
+
+
+def test_replay_detects_divergence(trace_path):
+    lines = trace_path.read_text().splitlines()
+    draw = next(i for i, line in enumerate(lines) if line.startswith('["R"'))
+    record = json.loads(lines[draw])
+    record[3] = 1 - record[3]
+    lines[draw] = json.dumps(record)
+    trace_path.write_text("\n".join(lines) + "\n")
+    with pytest.raises(TraceDivergenceError):
+        list(TraceReplayer(trace_path).replay())
+
+
+def test_spinning_robot_writes_collapsed_checks(faulted_trace_path):
+    lines = faulted_trace_path.read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    repeats = [record for record in records if record[0] == "P"]
+    assert len(repeats) == 1 and repeats[0][2] > 10, "Checks were not collapsed"
+    assert len(records) < 200
+    assert ["F", "robot", "Cycle exceeded its 0.05s deadline"] in records
+
+
+def test_callbacks_of_other_tools_are_not_timed(faulted_trace_path):
+    callbacks = {
+        json.loads(line)[2]
+        for line in faulted_trace_path.read_text().splitlines()
+        if line.startswith('["B"')
+    }
+    assert "current_state" in callbacks
+    assert not callbacks & {"restart_timers", "start_cycle", "report_fault"}
+
+
+def test_replay_reissues_fault_requests(faulted_trace_path):
+    (result,) = TraceReplayer(faulted_trace_path).replay()
+    assert result.final_state == "fault"
+
+
+def test_models_cannot_be_traced_twice(robot_factory):
+    robot = robot_factory()
+    recorder = TraceRecorder(io.StringIO())
+    recorder.attach(robot)
+    with pytest.raises(ValueError):
+        recorder.attach(robot)
+
+
+def test_flush_writes_pending_repeated_checks():
+    stream = io.StringIO()
+    recorder = TraceRecorder(stream)
+    for _ in range(5):
+        recorder.record("M", "robot", "pick", "idle", False)
+    assert stream.getvalue() == ""
+    recorder.flush()
+    recorder.record("M", "robot", "pick", "idle", False)
+    recorder.close()
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records == [
+        ["M", "robot", "pick", "idle", False],
+        ["P", 1, 4],
+        ["M", "robot", "pick", "idle", False],
+    ]
+
+
+def test_cycles_of_one_recorder_cannot_overlap(robot_factory):
+    recorder = TraceRecorder(io.StringIO())
+    with recorder.cycle(robot_factory(1)):
+        with pytest.raises(ValueError):
+            with recorder.cycle(robot_factory(2)):
+                pass
+    with recorder.cycle(robot_factory(2)) as robot:
+        robot.execute_fsm()
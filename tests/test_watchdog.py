@@ -0,0 +1,110 @@
+import pytest
+
+from model.callbacks import add_callback
+from model.watchdog import TimerWheel, Watchdog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def wheel():
+    wheel = TimerWheel(tick=0.01)
+    yield wheel
+    wheel.stop()
+
+
+@pytest.fixture(scope="function")
+def faults():
+    yield []
+
+
+@pytest.fixture(scope="function")
+def record_fault(faults):
+    def on_fault(*args):
+        faults.append(args)
+
+    yield on_fault
+
+
+def test_timer_wheel_fires_expired_timers_once():
+    clock = FakeClock()
+    wheel = TimerWheel(tick=1.0, slots=4, clock=clock, start_thread=False)
+    fired = []
+    wheel.schedule(2.0, lambda: fired.append("a"))
+    wheel.schedule(9.0, lambda: fired.append("b"))
+    wheel.schedule(3.0, lambda: fired.append("c")).cancel()
+    clock.now = 2.0
+    assert wheel.advance() == 1
+    clock.now = 20.0
+    assert wheel.advance() == 1
+    assert wheel.advance() == 0
+    assert fired == ["a", "b"]
+
+
+def test_watchdog_faults_robot_spinning_in_abort(
+    robot_factory, wheel, faults, record_fault
+):
+    robot = robot_factory()
+    robot.to_abort()
+    Watchdog({"abort": 0.05}, wheel=wheel, on_fault=record_fault).watch(robot)
+    robot.execute_fsm()
+    assert robot.state == "fault", "Robot did not fault"
+    report = robot.fault_report
+    assert report.state == "abort"
+    assert report.blocked["reset"] == {"errors_occurred": None}
+    assert faults == [(robot, report)]
+
+
+def test_watchdog_enforces_cycle_deadline(robot_factory, wheel, record_fault):
+    # Seed 4 picks successfully and fails to place, leaving no allowed trigger.
+    robot = robot_factory(4)
+    Watchdog(cycle_deadline=0.05, wheel=wheel, on_fault=record_fault).watch(robot)
+    robot.execute_fsm()
+    assert robot.state == "fault"
+    assert robot.fault_report.state == "place"
+    assert "deadline" in robot.fault_report.reason
+    assert not robot.arm.fault_requested
+
+
+def test_watchdog_ignores_states_left_in_time(robot_factory, wheel):
+    robot = robot_factory(1)
+    Watchdog({"pick": 10.0}, cycle_deadline=10.0, wheel=wheel).watch(robot)
+    robot.execute_fsm()
+    assert robot.state == "finished"
+    assert not robot.fault_requested
+
+
+def test_robot_recovers_from_fault(robot_factory, wheel, record_fault):
+    robot = robot_factory(4)
+    Watchdog(cycle_deadline=0.05, wheel=wheel, on_fault=record_fault).watch(robot)
+    robot.execute_fsm()
+    robot.clear_fault()
+    assert robot.state == "idle"
+    assert robot.arm.state == "idle"
+
+
+def test_fault_requested_too_late_does_not_leak_into_next_cycle(robot_factory):
+    clock = FakeClock()
+    wheel = TimerWheel(tick=1.0, clock=clock, start_thread=False)
+
+    def expire_place_timer(*_):
+        # The robot already decided to finish when the timer fires.
+        clock.now += 10.0
+        wheel.advance()
+
+    # Seed 1 completes its cycles.
+    robot = robot_factory(1)
+    Watchdog({"place": 5.0}, wheel=wheel, on_fault=lambda *_: None).watch(robot)
+    add_callback(robot.machine.get_state("place"), "exit", expire_place_timer)
+    robot.execute_fsm()
+    assert robot.state == "finished"
+    assert not robot.fault_requested and not robot.arm.fault_requested
+    robot.to_idle()
+    robot.start()
+    assert not robot.may_fault(), "Late request faults the next cycle"
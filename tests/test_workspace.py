@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from model.utils import Position
+from model.workspace import Box, Workspace
+
+
+@pytest.mark.parametrize(
+    "position, expected",
+    [
+        pytest.param(Position(5.0, 5.0, 5.0), True),
+        pytest.param(Position(1.0, 1.0, 1.0), False),
+        pytest.param(Position(2.0, 2.0, 2.0), False),
+        pytest.param(Position(20.0, 0.0, 0.0), False),
+        pytest.param(Position(float("nan"), 0.0, 0.0), False),
+    ],
+)
+def test_single_position_check(workspace, position, expected):
+    assert workspace.is_position_allowed(position) == expected
+
+
+def test_batch_check_matches_single_checks(workspace):
+    workspace.add_keep_out_zone(Box((-5.0, 3.0, 0.0), (-1.5, 7.5, 9.0)))
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-12.0, 12.0, size=(5000, 3))
+    expected = [workspace.is_position_allowed(Position(*point)) for point in points]
+    assert workspace.allowed_mask(points).tolist() == expected
+
+
+def test_trajectory_through_keep_out_zone_is_rejected(workspace):
+    samples = Workspace.sample_segment(
+        Position(-1.0, -1.0, 1.0), Position(3.0, 3.0, 1.0), 50
+    )
+    assert not workspace.is_trajectory_allowed(samples)
+    samples = Workspace.sample_segment(
+        Position(-1.0, 3.0, 1.0), Position(3.0, 3.0, 1.0), 50
+    )
+    assert workspace.is_trajectory_allowed(samples)
+
+
+def test_invalid_boxes_are_rejected():
+    with pytest.raises(ValueError):
+        Box((1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+
+
+def test_unbounded_keep_out_zone_is_checked_by_every_query():
+    half_space = Box((-np.inf, -np.inf, -np.inf), (np.inf, np.inf, 0.0))
+    workspace = Workspace(keep_out_zones=[half_space])
+    assert not workspace.is_position_allowed(Position(1e6, -1e6, -1.0))
+    assert workspace.is_position_allowed(Position(1e6, -1e6, 1.0))
+    points = np.array([[1e6, -1e6, -1.0], [1e6, -1e6, 1.0]])
+    assert workspace.allowed_mask(points).tolist() == [False, True]
+
+
+def test_large_keep_out_zones_are_not_indexed_cell_by_cell():
+    unbounded = Workspace(keep_out_zones=[Box((0, 0, 0), (100, 100, 100))])
+    assert not unbounded._grid
+    assert not unbounded.is_position_allowed(Position(50.0, 50.0, 50.0))
+
+    bounded = Workspace(
+        bounds=Box((-2, -2, -2), (2, 2, 2)),
+        keep_out_zones=[Box((0, 0, 0), (100, 100, 100))],
+    )
+    assert len(bounded._grid) == 27
+    assert not bounded.is_position_allowed(Position(1.5, 1.5, 1.5))
+    assert bounded.is_position_allowed(Position(-1.5, 1.5, 1.5))